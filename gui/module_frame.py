@@ -3,12 +3,14 @@ import customtkinter
 import tkinter as tk
 
 from gui.adsr_canvas import ADSRCanvas
+from synthesizer.transport import NOTE_DIVISIONS
 
 # If your module classes are in "modules", adjust accordingly
 from modules import (
     PolySynthModule,
     LowPassFilterModule,
     HighPassFilterModule,
+    BandPassFilterModule,
     TremoloModule,
     VibratoModule,
     ArpeggiatorModule
@@ -20,7 +22,7 @@ class ModuleFrame(customtkinter.CTkFrame):
 
     If user chooses an oscillator wave ("Sine","Square","Sawtooth","Triangle"),
     build a “poly synth” style UI with frequency slider + wave preview + ADSR on the right.
-    If user chooses "Low-Pass Filter","High-Pass Filter","Tremolo","Vibrato",
+    If user chooses "Low-Pass Filter","High-Pass Filter","Band-Pass Filter","Tremolo","Vibrato",
     we show the appropriate controls (cutoff sliders, effect depth/frequency, etc.).
     Now, if the user selects "Arpeggiator" we show a simple arpeggiator UI.
     """
@@ -83,6 +85,8 @@ class ModuleFrame(customtkinter.CTkFrame):
             self.build_lpf_ui()
         elif "high-pass" in self.module_type:
             self.build_hpf_ui()
+        elif "band-pass" in self.module_type:
+            self.build_bpf_ui()
         elif "tremolo" in self.module_type:
             self.build_tremolo_ui()
         elif "vibrato" in self.module_type:
@@ -119,7 +123,7 @@ class ModuleFrame(customtkinter.CTkFrame):
         if any(x in module_type for x in ["sine", "triangle", "square", "sawtooth", "poly", "synth"]):
             # Oscillators
             return "#1E90FF"  # DodgerBlue
-        elif "low-pass" in module_type or "high-pass" in module_type:
+        elif "low-pass" in module_type or "high-pass" in module_type or "band-pass" in module_type:
             # Filters
             return "#32CD32"  # LimeGreen
         elif "tremolo" in module_type or "vibrato" in module_type:
@@ -148,12 +152,14 @@ class ModuleFrame(customtkinter.CTkFrame):
             return LowPassFilterModule(cutoff=1000.0, sample_rate=44100)
         elif "high-pass" in module_type_str:
             return HighPassFilterModule(cutoff=500.0, sample_rate=44100)
+        elif "band-pass" in module_type_str:
+            return BandPassFilterModule(cutoff=1000.0, sample_rate=44100, slope=12, resonance=1.0)
         elif "tremolo" in module_type_str:
             return TremoloModule(sample_rate=44100, depth=0.5, lfo_rate=5.0, wave='sine')
         elif "vibrato" in module_type_str:
             return VibratoModule(sample_rate=44100, base_delay_ms=10.0, depth_ms=5.0, lfo_rate=5.0, wave='sine')
         elif "arpeggiator" in module_type_str:
-            return ArpeggiatorModule(note_callback=self.audio_manager.keyboard_handler.handle_note, sample_rate=44100, mode="up", rate=6.0, hold=False)
+            return ArpeggiatorModule(note_callback=self.audio_manager.keyboard_handler.dispatch_note, sample_rate=44100, mode="up", rate=6.0, hold=False)
         else:
             # fallback => poly synth with no wave
             return PolySynthModule(sample_rate=44100, max_voices=8, waveform="none")
@@ -161,11 +167,11 @@ class ModuleFrame(customtkinter.CTkFrame):
     def move_left(self):
         """
         Swap this module with the previous one in self.parent_gui.staging_modules
-        and do the same in audio_manager.module_chain.
+        and move it one place left in the audio_manager's chain (the audio thread
+        picks the new chain up at the next block, with a short crossfade).
         Then refresh the staging layout.
         """
         frames = self.parent_gui.staging_modules
-        chain = self.audio_manager.module_chain_manager.module_chain
 
         current_index = frames.index(self)
         if current_index > 0:
@@ -174,22 +180,17 @@ class ModuleFrame(customtkinter.CTkFrame):
                 frames[current_index - 1], frames[current_index]
             )
 
-            # also swap in the audio_manager's module_chain
-            mod_index = chain.index(self.module)
-            if mod_index > 0:
-                chain[mod_index], chain[mod_index - 1] = (
-                    chain[mod_index - 1], chain[mod_index]
-                )
+            # also move it in the audio_manager's module chain
+            self.audio_manager.module_chain_manager.move_module(self.module, -1)
 
             self.parent_gui.refresh_staging_layout()
 
     def move_right(self):
         """
         Swap this module with the next one in the staging list
-        and also swap in audio_manager.module_chain.
+        and also move it in the audio_manager's module chain.
         """
         frames = self.parent_gui.staging_modules
-        chain = self.audio_manager.module_chain_manager.module_chain
 
         current_index = frames.index(self)
         if current_index < len(frames) - 1:
@@ -198,18 +199,14 @@ class ModuleFrame(customtkinter.CTkFrame):
                 frames[current_index + 1], frames[current_index]
             )
 
-            # swap in the module_chain
-            mod_index = chain.index(self.module)
-            if mod_index < len(chain) - 1:
-                chain[mod_index], chain[mod_index + 1] = (
-                    chain[mod_index + 1], chain[mod_index]
-                )
+            # move it in the module chain
+            self.audio_manager.module_chain_manager.move_module(self.module, 1)
 
             self.parent_gui.refresh_staging_layout()
             
     def remove_self(self):
-        if self.module in self.audio_manager.module_chain_manager.module_chain:
-            self.audio_manager.module_chain_manager.module_chain.remove(self.module)
+        # Fades the module out before it leaves the chain
+        self.audio_manager.module_chain_manager.remove_module(self.module)
         self.parent_gui.remove_module(self)
 
     # ---------------------------------------------------------
@@ -340,6 +337,8 @@ class ModuleFrame(customtkinter.CTkFrame):
         self.lpf_canvas.pack(pady=5)
         self.draw_lpf_curve()
 
+        self.build_filter_shape_controls(slopes=["6 dB", "12 dB", "24 dB"], default_q=0.707)
+
     def draw_lpf_curve(self):  # NEEDS WORK
         self.lpf_canvas.delete("all")
         cutoff = float(self.slider_var1.get())
@@ -412,6 +411,8 @@ class ModuleFrame(customtkinter.CTkFrame):
         self.hpf_canvas.pack(pady=5)
         self.draw_hpf_curve()
 
+        self.build_filter_shape_controls(slopes=["6 dB", "12 dB", "24 dB"], default_q=0.707)
+
     def draw_hpf_curve(self):  # NEEDS WORK
         self.hpf_canvas.delete("all")
         cutoff = float(self.slider_var1.get())
@@ -447,6 +448,153 @@ class ModuleFrame(customtkinter.CTkFrame):
             self.module.set_cutoff(c)
         self.draw_hpf_curve()
 
+    # ---------------------------------------------------------
+    # 3b) Band-Pass Filter UI
+    # ---------------------------------------------------------
+    def build_bpf_ui(self):
+        lbl = customtkinter.CTkLabel(self, text="Center:", text_color="white")
+        lbl.pack(pady=(5,2))
+
+        self.slider_var1.set(1000.0)
+        self.slider_label_var1.set("1000.0")
+
+        cutoff_slider = customtkinter.CTkSlider(
+            self, from_=20, to=5000, number_of_steps=4980,
+            variable=self.slider_var1,
+            command=self.on_bpf_cutoff_change,
+            width=110
+        )
+        cutoff_slider.pack(padx=5, pady=5)
+
+        numeric_lbl = customtkinter.CTkLabel(
+            self, textvariable=self.slider_label_var1, text_color="white"
+        )
+        numeric_lbl.pack()
+
+        self.bpf_canvas_width = 160
+        self.bpf_canvas_height = 80
+        self.bpf_canvas = tk.Canvas(
+            self, 
+            width=self.bpf_canvas_width, 
+            height=self.bpf_canvas_height,
+            bg="#222222", 
+            highlightthickness=1,
+            highlightbackground=self.get_colour(self.module_type)
+        )
+        self.bpf_canvas.pack(pady=5)
+        self.draw_bpf_curve()
+
+        self.build_filter_shape_controls(slopes=["12 dB", "24 dB"], default_q=1.0)
+
+    def draw_bpf_curve(self):
+        self.bpf_canvas.delete("all")
+        center = float(self.slider_var1.get())
+        q = float(self.slider_var2.get()) if self.slider_var2.get() > 0 else 1.0
+
+        w = self.bpf_canvas_width
+        h = self.bpf_canvas_height
+        c_log = math.log10(center)
+        min_log, max_log = math.log10(20), math.log10(5000)
+        center_x = (c_log - min_log) / (max_log - min_log) * w
+        half_width = max(5.0, 0.25 * w / q)
+
+        num_points = 50
+        points = []
+        for i in range(num_points):
+            x = i * (w / (num_points - 1))
+            ratio = min(1.0, abs(x - center_x) / half_width)
+            y = 0.3 * h + 0.5 * h * ratio
+            points.append((x, y))
+
+        flat_pts = []
+        for (xv, yv) in points:
+            flat_pts.extend([xv, yv])
+
+        self.bpf_canvas.create_line(flat_pts, fill="white", width=2, smooth=True)
+
+    def on_bpf_cutoff_change(self, val):
+        c = float(val)
+        self.slider_label_var1.set(f"{c:.1f}")
+        if hasattr(self.module, 'set_cutoff'):
+            self.module.set_cutoff(c)
+        self.draw_bpf_curve()
+
+    # ---------------------------------------------------------
+    # Filter slope + resonance (shared by LPF / HPF / BPF)
+    # ---------------------------------------------------------
+    def build_filter_shape_controls(self, slopes, default_q):
+        row = customtkinter.CTkFrame(self, fg_color="#666666")
+        row.pack(pady=(0, 2))
+
+        self.filter_slope_var = tk.StringVar(value=slopes[0])
+        slope_menu = customtkinter.CTkOptionMenu(
+            row,
+            variable=self.filter_slope_var,
+            values=slopes,
+            command=self.on_filter_slope_change,
+            width=80
+        )
+        slope_menu.grid(row=0, column=0, padx=2)
+
+        self.q_label = customtkinter.CTkLabel(row, text="Q:", text_color="white", width=20)
+        self.q_label.grid(row=0, column=1, padx=(4, 0))
+
+        self.slider_var2.set(default_q)
+        self.q_slider = customtkinter.CTkSlider(
+            row, from_=0.3, to=10.0,
+            variable=self.slider_var2,
+            command=self.on_filter_resonance_change,
+            width=80
+        )
+        self.q_slider.grid(row=0, column=2, padx=2)
+        self.update_q_control(slopes[0])
+
+    def on_filter_slope_change(self, selected: str):
+        slope = int(selected.split()[0])
+        if hasattr(self.module, 'set_slope'):
+            self.module.set_slope(slope)
+        self.update_q_control(selected)
+
+    def update_q_control(self, selected: str):
+        """
+        The 6 dB slope is a 1-pole filter without resonance: grey Q out there.
+        """
+        resonant = int(selected.split()[0]) != 6
+        self.q_slider.configure(state="normal" if resonant else "disabled")
+        self.q_label.configure(text_color="white" if resonant else "#999999")
+
+    def on_filter_resonance_change(self, val):
+        q = float(val)
+        if hasattr(self.module, 'set_resonance'):
+            self.module.set_resonance(q)
+        if hasattr(self, 'bpf_canvas'):
+            self.draw_bpf_curve()
+
+    # ---------------------------------------------------------
+    # Tempo sync (shared by the tremolo, vibrato and arpeggiator UIs)
+    # ---------------------------------------------------------
+    def build_sync_control(self, parent):
+        """
+        "Free" runs at the Rate slider; a note division locks the module
+        to the global transport tempo.
+        """
+        sync_label = customtkinter.CTkLabel(parent, text="Sync:", text_color="white")
+        sync_label.pack(pady=(0, 2))
+
+        self.sync_var = tk.StringVar(value="Free")
+        sync_menu = customtkinter.CTkOptionMenu(
+            parent,
+            variable=self.sync_var,
+            values=["Free"] + list(NOTE_DIVISIONS),
+            command=self.on_sync_change,
+            width=110
+        )
+        sync_menu.pack(padx=5, pady=(0, 10))
+
+    def on_sync_change(self, selected: str):
+        if hasattr(self.module, 'set_sync'):
+            self.module.set_sync(None if selected == "Free" else selected)
+
     # ---------------------------------------------------------
     # 4) Tremolo UI
     # ---------------------------------------------------------
@@ -538,6 +686,8 @@ class ModuleFrame(customtkinter.CTkFrame):
         )
         rate_value_lbl.pack(pady=(0, 10))
 
+        self.build_sync_control(right_frame)
+
         # Draw initial wave
         self.tremolo_canvas.after(100, lambda: self.draw_lfo_waveform(
             canvas=self.tremolo_canvas,
@@ -681,6 +831,8 @@ class ModuleFrame(customtkinter.CTkFrame):
         )
         rate_value_lbl.pack(pady=(0, 10))
 
+        self.build_sync_control(right_frame)
+
         # Draw initial wave
         self.vibrato_canvas.after(100, lambda: self.draw_lfo_waveform(
             canvas=self.vibrato_canvas,
@@ -833,6 +985,8 @@ class ModuleFrame(customtkinter.CTkFrame):
         tempo_value_lbl = customtkinter.CTkLabel(right_frame, textvariable=self.tempo_label_var, text_color="white")
         tempo_value_lbl.pack(pady=(0, 10))
 
+        self.build_sync_control(right_frame)
+
         # ─────────────────────────────────────────────────────────
         # Add a button to toggle hold ON/OFF
         # ─────────────────────────────────────────────────────────
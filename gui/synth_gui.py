@@ -121,6 +121,30 @@ class SynthGUI(customtkinter.CTk):
         )
         self.gain_entry.grid(row=0, column=1, sticky="w", padx=(280,0), pady=5)
 
+        # Tempo (global transport)
+        self.bpm_label = customtkinter.CTkLabel(
+            self.top_bar_frame,
+            text="BPM",
+            text_color="white"
+        )
+        self.bpm_label.grid(row=1, column=0, sticky="w", padx=(10,0), pady=5)
+
+        self.bpm_var = tk.DoubleVar(value=120.0)
+        self.bpm_slider = customtkinter.CTkSlider(
+            self.top_bar_frame, from_=40.0, to=240.0,
+            variable=self.bpm_var,
+            command=self.on_bpm_change, width=200
+        )
+        self.bpm_slider.grid(row=1, column=0, sticky="w", padx=(70,5), pady=5)
+
+        self.bpm_entry_var = tk.StringVar(value="120")
+        self.bpm_entry = customtkinter.CTkEntry(
+            self.top_bar_frame,
+            textvariable=self.bpm_entry_var,
+            width=40
+        )
+        self.bpm_entry.grid(row=1, column=0, sticky="w", padx=(280,0), pady=5)
+
         # Start/Stop buttons
         self.start_button = customtkinter.CTkButton(
             self.top_bar_frame, text="Start Synth",
@@ -204,6 +228,13 @@ class SynthGUI(customtkinter.CTk):
         if hasattr(self.audio_manager.global_controls, 'set_global_gain'):
             self.audio_manager.global_controls.set_global_gain(val)
 
+    def on_bpm_change(self, value):
+        val = float(value)
+        self.bpm_entry_var.set(f"{val:.0f}")
+        # Pass tempo to the AudioManager's transport
+        if hasattr(self.audio_manager, 'transport'):
+            self.audio_manager.transport.set_bpm(val)
+
     def on_start_synth(self):
         self.audio_manager.start_stream()
 
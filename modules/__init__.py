@@ -2,16 +2,20 @@ from .module import Module
 from .polysynth_module import PolySynthModule
 from .lowpass_filter_module import LowPassFilterModule
 from .highpass_filter_module import HighPassFilterModule
+from .bandpass_filter_module import BandPassFilterModule
 from .tremolo_module import TremoloModule
 from .vibrato_module import VibratoModule
 from .arpeggiator_module import ArpeggiatorModule
+from .mixer_module import MixerModule
 
 __all__ = [
     "Module",
     "PolySynthModule",
     "LowPassFilterModule",
     "HighPassFilterModule",
+    "BandPassFilterModule",
     "TremoloModule",
     "VibratoModule",
-    "ArpeggiatorModule"
+    "ArpeggiatorModule",
+    "MixerModule"
 ]
@@ -1,4 +1,6 @@
-import numpy as np
+import bisect
+import math
+
 from .module import Module
 
 class ArpeggiatorModule(Module):
@@ -8,12 +10,15 @@ class ArpeggiatorModule(Module):
     It triggers repeated note_on/note_off events for any notes that are physically 
     or latched held.
 
-    The arpeggiator is clocked by the block size, i.e. each generate(...) call sees 
-    how many samples have passed, and if enough time has elapsed to move to the 
-    next note in the pattern, we do so.
+    The arpeggiator keeps its own sample clock. ModuleChainManager.process_block
+    asks samples_until_step() and splits the block there, so every step fires at
+    its exact sample offset (several per block at high rates), independent of the
+    device buffer size. Used on its own, generate(...) fires due steps at the
+    start of each call instead.
 
-    (Does NOT transform audio -- input_audio is returned unchanged)
+    (Does NOT transform audio -- input_audio is returned unchanged, without a copy)
     """
+    accepts_out = True
 
     def __init__(self, 
                  note_callback,    # Must be: (midi_note: int, is_press: bool, source="user") -> None
@@ -23,7 +28,7 @@ class ArpeggiatorModule(Module):
                  hold=False):
         super().__init__()
 
-        self.note_callback = note_callback  # typically audio_manager.note_handler
+        self.note_callback = note_callback  # typically keyboard_handler.dispatch_note
         self.sample_rate = sample_rate
 
         # "up", "down", or "updown"
@@ -33,10 +38,15 @@ class ArpeggiatorModule(Module):
 
         self.rate = rate
         self.hold_enabled = hold
+        # Note division (e.g. "1/16", "1/8T") when synced to the transport, else None
+        self.sync_division = None
 
-        # The sets for physically held or latched notes
+        # The sets for physically held or latched notes, each mirrored by a
+        # sorted list that is updated incrementally (bisect) on every change
         self.held_notes = set()
         self.latched_notes = set()
+        self._held_sorted = []
+        self._latched_sorted = []
 
         # The index in the arpeggio pattern
         self.current_index = 0
@@ -46,9 +56,9 @@ class ArpeggiatorModule(Module):
         self.last_note_playing = None
 
         # Time measure in samples: how many samples have accumulated since last step
-        self.samples_since_step = 0
-        # Samples to wait per note
-        self.samples_per_note = int(self.sample_rate / max(0.0001, self.rate))
+        self.samples_since_step = 0.0
+        # Samples to wait per note (fractional, so fast rates do not drift)
+        self.samples_per_note = self.sample_rate / max(0.0001, self.rate)
 
     # ─────────────────────────────────────────────────────────
     # 1) Public Setters (ModuleFrame can call them)
@@ -58,7 +68,17 @@ class ArpeggiatorModule(Module):
         Control how many notes per second the arpeggio cycles through.
         """
         self.rate = max(0.01, new_rate)
-        self.samples_per_note = int(self.sample_rate / self.rate)
+        if self.sync_division is None:
+            self.samples_per_note = self.sample_rate / self.rate
+
+    def set_sync(self, division):
+        """
+        Lock the steps to a note division of the transport ("1/8", "1/16T", ...),
+        or pass None to run free at 'rate' notes per second.
+        """
+        self.sync_division = division
+        if division is None:
+            self.samples_per_note = self.sample_rate / self.rate
 
     def set_mode(self, new_mode: str):
         """
@@ -78,11 +98,33 @@ class ArpeggiatorModule(Module):
             # remove latched notes that are not physically held
             to_remove = [n for n in self.latched_notes if n not in self.held_notes]
             for note in to_remove:
-                self.latched_notes.remove(note)
+                self._discard(self.latched_notes, self._latched_sorted, note)
+            self._stop_if_idle()
 
     # ─────────────────────────────────────────────────────────
     # 2) Note On/Off from the user
     # ─────────────────────────────────────────────────────────
+    @staticmethod
+    def _add(notes, ordered, midi_note):
+        if midi_note not in notes:
+            notes.add(midi_note)
+            bisect.insort(ordered, midi_note)
+
+    @staticmethod
+    def _discard(notes, ordered, midi_note):
+        if midi_note in notes:
+            notes.remove(midi_note)
+            del ordered[bisect.bisect_left(ordered, midi_note)]
+
+    def _stop_if_idle(self):
+        """
+        Turn the sounding note off as soon as nothing is left to arpeggiate,
+        at the offset of the event that emptied the list.
+        """
+        if not self._get_active_notes() and self.last_note_playing is not None:
+            self.note_callback(self.last_note_playing, False, source="arpeggiator")
+            self.last_note_playing = None
+
     def note_on(self, midi_note: int):
         """
         Called when a key is pressed.
@@ -97,15 +139,15 @@ class ArpeggiatorModule(Module):
         if self.hold_enabled:
             # Toggle behavior: if note already held, remove it; else add it.
             if midi_note in self.held_notes:
-                self.held_notes.remove(midi_note)
-                if midi_note in self.latched_notes:
-                    self.latched_notes.remove(midi_note)
+                self._discard(self.held_notes, self._held_sorted, midi_note)
+                self._discard(self.latched_notes, self._latched_sorted, midi_note)
+                self._stop_if_idle()
             else:
-                self.held_notes.add(midi_note)
-                self.latched_notes.add(midi_note)
+                self._add(self.held_notes, self._held_sorted, midi_note)
+                self._add(self.latched_notes, self._latched_sorted, midi_note)
         else:
             # Normal behavior: just add the note.
-            self.held_notes.add(midi_note)
+            self._add(self.held_notes, self._held_sorted, midi_note)
 
 
     def note_off(self, midi_note: int):
@@ -119,35 +161,35 @@ class ArpeggiatorModule(Module):
         toggling is entirely handled by note_on.
         """
         if not self.hold_enabled:
-            if midi_note in self.held_notes:
-                self.held_notes.remove(midi_note)
-            if midi_note in self.latched_notes:
-                self.latched_notes.remove(midi_note)
+            self._discard(self.held_notes, self._held_sorted, midi_note)
+            self._discard(self.latched_notes, self._latched_sorted, midi_note)
+            self._stop_if_idle()
 
     def clear_latched(self):
         """
         Manually clear out latched notes (if user toggles hold off).
         """
         self.latched_notes.clear()
+        del self._latched_sorted[:]
+        self._stop_if_idle()
 
     # ─────────────────────────────────────────────────────────
     # 3) The arpeggio logic
     # ─────────────────────────────────────────────────────────
     def _get_active_notes(self):
         """
-        Return a sorted list of notes to arpeggiate: 
+        Return the sorted list of notes to arpeggiate (kept up to date by
+        note_on/note_off; do not modify it):
          - latched_notes if hold_enabled,
          - otherwise physically held_notes.
 
-        For "up" or "down", we do a simple reverse. 
+        For "down", we index from the end. 
         For "updown", we keep them sorted ascending and rely on self.updown_direction 
         to move current_index forward/backward.
         """
         if self.hold_enabled:
-            active = sorted(self.latched_notes)
-        else:
-            active = sorted(self.held_notes)
-        return active
+            return self._latched_sorted
+        return self._held_sorted
 
     def _advance_arpeggio(self, active):
         """
@@ -164,11 +206,11 @@ class ArpeggiatorModule(Module):
 
         if self.mode in ["up", "down"]:
             # We'll treat them as strictly ascending or descending
-            if self.mode == "down":
-                active.reverse()
-
             # pick note at current_index
-            note = active[self.current_index % n]
+            if self.mode == "down":
+                note = active[n - 1 - self.current_index % n]
+            else:
+                note = active[self.current_index % n]
 
             # Turn off last note if different
             if self.last_note_playing is not None and self.last_note_playing != note:
@@ -212,33 +254,56 @@ class ArpeggiatorModule(Module):
 
 
     # ─────────────────────────────────────────────────────────
-    # 4) generate(...)
-    #    We'll treat each call as passing `num_samples` time. 
-    #    If enough samples have elapsed to step to the next note, do so.
-    #    Pass input_audio through unchanged (this module doesn't generate audio).
+    # 4) Sample clock
     # ─────────────────────────────────────────────────────────
-    def generate(self, num_samples: int, input_audio=None):
-        if input_audio is None:
-            output = np.zeros(num_samples, dtype=np.float32)
-        else:
-            output = input_audio.copy()
+    def samples_until_step(self) -> int:
+        """
+        Samples from now until the next step is due (0 = due now).
+        """
+        return max(0, math.ceil(self.samples_per_note - self.samples_since_step))
 
-        # Accumulate time
-        self.samples_since_step += num_samples
+    def sync_transport(self, transport):
+        """
+        Called once per block with the engine transport. When synced, the clock
+        is re-derived from the block's beat position so steps sit on the grid.
+        """
+        if self.sync_division is None:
+            return
+        step_samples = transport.division_samples(self.sync_division)
+        if step_samples is None:
+            return
+        step_beats = step_samples / transport.samples_per_beat
 
-        # Get the active notes once per block
-        active = self._get_active_notes()
-        num_active = len(active)
+        # Next grid line at or after the block start
+        next_step = math.ceil(transport.block_start_beat / step_beats - 1e-9) * step_beats
+        until = (next_step - transport.block_start_beat) * transport.samples_per_beat
+        if until < 1e-6:
+            until = 0.0
+        self.samples_per_note = step_samples
+        self.samples_since_step = step_samples - until
 
-        # How many steps can we move in this block?
+    def fire_due_steps(self):
+        """
+        Take every step that is due at the current sample.
+        """
         while self.samples_since_step >= self.samples_per_note:
             self.samples_since_step -= self.samples_per_note
-            self._advance_arpeggio(active)
+            self._advance_arpeggio(self._get_active_notes())
 
-        # If no notes are active but we have a note playing, turn it off
-        if num_active == 0 and self.last_note_playing is not None:
-            self.note_callback(self.last_note_playing, False, source="arpeggiator")
-            self.last_note_playing = None
+    # ─────────────────────────────────────────────────────────
+    # 5) generate(...)
+    #    Each call passes `num_samples` of time. Steps that are due at the
+    #    start of the call fire first; when the chain splits blocks at
+    #    samples_until_step(), that is exactly the step's sample.
+    #    Pass input_audio through unchanged (this module doesn't generate audio).
+    # ─────────────────────────────────────────────────────────
+    def generate(self, num_samples: int, input_audio=None, out=None):
+        # Pass the chain's buffer straight through (silence if there is none)
+        output = Module.generate(self, num_samples, input_audio, out)
+
+        self.fire_due_steps()
+        # Accumulate time
+        self.samples_since_step += num_samples
 
         # Return the input unmodified (arpeggiator doesn't affect the audio)
         return output
@@ -0,0 +1,15 @@
+# modules/BandPassFilterModule.py
+
+from .filter_module import FilterModule
+
+class BandPassFilterModule(FilterModule):
+    """
+    A resonant band-pass filter module that processes input_audio.
+    'cutoff' is the center frequency, 'resonance' the Q (bandwidth);
+    slope 12 is one biquad, 24 two cascaded biquads.
+    """
+    kind = 'bandpass'
+    slopes = (12, 24)
+
+    def __init__(self, cutoff=1000.0, sample_rate=44100, slope=12, resonance=1.0):
+        super().__init__(cutoff, sample_rate, slope, resonance)
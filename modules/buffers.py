@@ -0,0 +1,81 @@
+# modules/buffers.py
+
+import numpy as np
+
+
+class ScratchBuffers:
+    """
+    Named work arrays that a module reuses from block to block.
+
+    get(name, shape, dtype) returns a C-contiguous view of a flat buffer that only
+    grows (the first time a larger block arrives), so once the block size has
+    been seen, processing allocates no new array memory. Views must not be kept
+    past the block: the next get(...) with the same name hands out the same memory.
+    """
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype=np.float64):
+        if isinstance(shape, int):
+            shape = (shape,)
+        size = 1
+        for dim in shape:
+            size *= dim
+
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = np.empty(max(size, 1), dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer[:size].reshape(shape)
+
+
+class BufferPool:
+    """
+    A fixed number of preallocated float32 block buffers, addressed by index
+    (ModuleChainManager's chain buffers, an ExecutionPlan's edge buffers).
+    They only grow when a block larger than any before arrives, so steady-state
+    processing reuses the same memory every callback.
+    """
+    def __init__(self, count=3, frames=0):
+        self.count = count
+        self.frames = 0
+        self.buffers = []
+        self.reserve(frames)
+
+    def reserve(self, frames):
+        if frames > self.frames:
+            self.buffers = [np.zeros(frames, dtype=np.float32) for _ in range(self.count)]
+            self.frames = frames
+
+    def get(self, index, frames):
+        return self.buffers[index][:frames]
+
+
+_RAMPS = {}
+
+
+def sample_ramp(num_samples, dtype=np.float64):
+    """
+    Read-only [0, 1, ..., num_samples - 1] shared by all modules (grown on demand).
+    """
+    ramp = _RAMPS.get(dtype)
+    if ramp is None or ramp.size < num_samples:
+        ramp = np.arange(max(num_samples, 4096), dtype=dtype)
+        ramp.setflags(write=False)
+        _RAMPS[dtype] = ramp
+    return ramp[:num_samples]
+
+
+_SILENCE = {}
+
+
+def silence(num_samples, dtype=np.float32):
+    """
+    Read-only block of zeros shared by all modules (grown on demand).
+    """
+    zeros = _SILENCE.get(dtype)
+    if zeros is None or zeros.size < num_samples:
+        zeros = np.zeros(max(num_samples, 4096), dtype=dtype)
+        zeros.setflags(write=False)
+        _SILENCE[dtype] = zeros
+    return zeros[:num_samples]
@@ -0,0 +1,99 @@
+# modules/delay_line.py
+
+import math
+
+import numpy as np
+
+from .buffers import ScratchBuffers, sample_ramp
+
+
+class DelayLine:
+    """
+    Block-based modulated delay line with linear interpolation.
+
+    The ring buffer is sized to the longest delay it has to serve, rounded up to a
+    power of two so positions wrap with a bit mask. process(...) writes a block
+    and reads every fractional tap of that block with one vectorized gather;
+    blocks longer than the buffer can hold alongside the delay are split into
+    chunks so unread history is never overwritten.
+    """
+    def __init__(self, max_delay_samples):
+        self.max_delay = float(max_delay_samples)
+        # Oldest sample a read can touch, relative to the newest write
+        reach = int(math.ceil(self.max_delay)) + 1
+
+        # Leave at least as much room for the incoming block as for the history
+        size = 1
+        while size < 2 * reach:
+            size <<= 1
+        self.size = size
+        self.mask = size - 1
+        self.chunk = size - reach
+        self.buffer = np.zeros(size, dtype=np.float32)
+        self.write_pos = 0
+        self._scratch = ScratchBuffers()
+
+    def reset(self):
+        self.buffer[:] = 0.0
+        self.write_pos = 0
+
+    def process(self, x, delays, out=None):
+        """
+        Write the block x and return, for every sample i, the line read
+        'delays[i]' samples behind it (0 = the sample itself) as float32, in
+        'out' if given. 'delays' is a scalar or an array like x; an array is
+        clipped to [0, max_delay] in place.
+        """
+        num_samples = x.shape[0]
+        if out is None:
+            out = np.empty(num_samples, dtype=np.float32)
+        scalar_delay = np.ndim(delays) == 0
+        if scalar_delay:
+            delays = min(max(float(delays), 0.0), self.max_delay)
+        else:
+            np.clip(delays, 0.0, self.max_delay, out=delays)
+
+        buffer = self.buffer
+        size = self.size
+        mask = self.mask
+        scratch = self._scratch
+
+        for start in range(0, num_samples, self.chunk):
+            stop = min(start + self.chunk, num_samples)
+            count = stop - start
+
+            # Write the chunk (wrapping at most once)
+            write_pos = self.write_pos
+            first = min(count, size - write_pos)
+            buffer[write_pos:write_pos + first] = x[start:start + first]
+            if first < count:
+                buffer[:count - first] = x[start + first:stop]
+
+            # Read positions, shifted by one buffer length so they are never negative
+            read = scratch.get('read', count)
+            np.add(sample_ramp(count), float(write_pos + size), out=read)
+            read -= delays if scalar_delay else delays[start:stop]
+            whole = scratch.get('whole', count)
+            np.floor(read, out=whole)
+            read -= whole
+            frac = scratch.get('frac', count, np.float32)
+            np.copyto(frac, read, casting='same_kind')
+            index = scratch.get('index', count, np.int64)
+            np.copyto(index, whole, casting='unsafe')
+            np.bitwise_and(index, mask, out=index)
+
+            low = scratch.get('low', count, np.float32)
+            high = scratch.get('high', count, np.float32)
+            np.take(buffer, index, out=low, mode='clip')
+            index += 1
+            np.bitwise_and(index, mask, out=index)
+            np.take(buffer, index, out=high, mode='clip')
+
+            # low + frac * (high - low)
+            high -= low
+            chunk_out = out[start:stop]
+            np.multiply(high, frac, out=chunk_out)
+            chunk_out += low
+
+            self.write_pos = (write_pos + count) & mask
+        return out
@@ -0,0 +1,77 @@
+# modules/envelope.py
+
+import functools
+
+import numpy as np
+
+ENVELOPE_CURVES = ('linear', 'exponential')
+
+# How bent the 'exponential' segments are (larger = steeper start, longer tail)
+EXP_CURVATURE = 5.0
+
+
+def _progress(num_steps, curve):
+    """
+    0 -> 1 progress of one envelope segment, sampled at num_steps + 1 points.
+    """
+    x = np.linspace(0.0, 1.0, num_steps + 1)
+    if curve == 'exponential':
+        return (1.0 - np.exp(-EXP_CURVATURE * x)) / (1.0 - np.exp(-EXP_CURVATURE))
+    return x
+
+
+class EnvelopeShape:
+    """
+    Precomputed ADSR ramps for one (attack, decay, sustain, release) setting.
+
+      - attack_decay[k]: level k samples after a note starts from silence; the last
+        entry is the sustain level, so any position past the end means "sustain".
+      - release[k]: release ramp from 1 to 0, scaled by the level at note-off.
+
+    A voice only has to remember its position in one of the two ramps; rendering a
+    block is a single gather per voice group, whatever segments the block crosses.
+    """
+    def __init__(self, attack_decay, attack_length, release):
+        self.attack_decay = attack_decay
+        self.attack_length = attack_length
+        self.release = release
+        self.sustain = float(attack_decay[-1])
+
+    def attack_position(self, level):
+        """
+        Position in the attack ramp that already sits at 'level', so a voice
+        retriggered while still sounding continues from where it is.
+        """
+        attack = self.attack_decay[:self.attack_length]
+        return int(np.searchsorted(attack, level))
+
+
+@functools.lru_cache(maxsize=32)
+def get_envelope_shape(attack, decay, sustain, release, sample_rate, curve='linear'):
+    """
+    Build (or fetch from the cache) the EnvelopeShape for an ADSR setting.
+    Called from the UI thread when the settings change, never from the callback.
+    """
+    num_attack = max(0, int(round(attack * sample_rate)))
+    num_decay = max(0, int(round(decay * sample_rate)))
+    num_release = max(1, int(round(release * sample_rate)))
+
+    if num_attack > 0:
+        attack_ramp = _progress(num_attack, curve)
+    else:
+        attack_ramp = np.ones(1)
+
+    if num_decay > 0:
+        decay_ramp = 1.0 - (1.0 - sustain) * _progress(num_decay, curve)[1:]
+    else:
+        # No decay time: the peak sample already sits at the sustain level
+        attack_ramp = attack_ramp.copy()
+        attack_ramp[-1] = sustain
+        decay_ramp = np.empty(0)
+
+    attack_decay = np.concatenate((attack_ramp, decay_ramp)).astype(np.float32)
+    release_ramp = (1.0 - _progress(num_release, curve)).astype(np.float32)
+
+    attack_decay.setflags(write=False)
+    release_ramp.setflags(write=False)
+    return EnvelopeShape(attack_decay, num_attack, release_ramp)
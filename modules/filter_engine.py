@@ -0,0 +1,280 @@
+# modules/filter_engine.py
+
+import numpy as np
+
+from .buffers import ScratchBuffers
+
+FILTER_SLOPES = (6, 12, 24)
+
+# Q of the two sections of a 4th-order Butterworth response
+_BUTTERWORTH_Q4 = (0.5412, 1.3066)
+_BUTTERWORTH_Q2 = 0.7071
+
+
+def _scan_first_order(u, pole, tmp=None):
+    """
+    In-place inclusive scan of w[n] = pole * w[n-1] + u[n].
+    Hillis-Steele doubling: log2(N) vectorized steps instead of N Python steps.
+    'pole' is a scalar, or an array with one pole per sample (time-varying filter).
+    'tmp' is an optional work array at least as long as u.
+    """
+    n = u.shape[0]
+    if np.ndim(pole) > 0:
+        p = np.array(pole, dtype=np.float64)
+        d = 1
+        while d < n:
+            u[d:] += p[d:] * u[:-d]
+            p[d:] = p[d:] * p[:-d]
+            d *= 2
+        return u
+
+    if tmp is None:
+        tmp = np.empty(n, dtype=np.float64)
+    p = pole
+    d = 1
+    while d < n:
+        t = tmp[:n - d]
+        np.multiply(u[:-d], p, out=t)
+        u[d:] += t
+        p *= p
+        d *= 2
+    return u
+
+
+def _scan_second_order(u0, u1, a, tmp=None):
+    """
+    In-place inclusive scan of the 2-D state recurrence w[n] = A @ w[n-1] + u[n],
+    with the two state components held in separate arrays u0, u1.
+    'tmp' is an optional triple of work arrays at least as long as u0.
+    """
+    n = u0.shape[0]
+    if tmp is None:
+        tmp = (np.empty(n), np.empty(n), np.empty(n))
+    p00, p01, p10, p11 = a[0][0], a[0][1], a[1][0], a[1][1]
+    d = 1
+    while d < n:
+        w0 = u0[:-d]
+        w1 = u1[:-d]
+        t0, t1, t2 = tmp[0][:n - d], tmp[1][:n - d], tmp[2][:n - d]
+        # t0 = p00 * w0 + p01 * w1,  t1 = p10 * w0 + p11 * w1
+        np.multiply(w0, p00, out=t0)
+        np.multiply(w1, p01, out=t2)
+        t0 += t2
+        np.multiply(w0, p10, out=t1)
+        np.multiply(w1, p11, out=t2)
+        t1 += t2
+        u0[d:] += t0
+        u1[d:] += t1
+        # A^(2d) = (A^d)^2
+        p00, p01, p10, p11 = (p00 * p00 + p01 * p10, p00 * p01 + p01 * p11,
+                              p10 * p00 + p11 * p10, p10 * p01 + p11 * p11)
+        d *= 2
+    return u0, u1
+
+
+def _scan_second_order_varying(u0, u1, m00, m01, m10, m11):
+    """
+    Same as _scan_second_order, but with a different matrix A[n] for every sample
+    (entries m00..m11 are per-sample arrays, updated in place). Each step combines
+    the partial products of neighbouring spans: P[n] <- P[n] @ P[n-d].
+    """
+    n = u0.shape[0]
+    d = 1
+    while d < n:
+        w0 = u0[:-d]
+        w1 = u1[:-d]
+        q00, q01, q10, q11 = m00[d:], m01[d:], m10[d:], m11[d:]
+        r00, r01, r10, r11 = m00[:-d], m01[:-d], m10[:-d], m11[:-d]
+        t0 = q00 * w0 + q01 * w1
+        t1 = q10 * w0 + q11 * w1
+        u0[d:] += t0
+        u1[d:] += t1
+        n00 = q00 * r00 + q01 * r10
+        n01 = q00 * r01 + q01 * r11
+        n10 = q10 * r00 + q11 * r10
+        n11 = q10 * r01 + q11 * r11
+        m00[d:] = n00
+        m01[d:] = n01
+        m10[d:] = n10
+        m11[d:] = n11
+        d *= 2
+    return u0, u1
+
+
+def process_section(x, coeffs, state, out=None, scratch=None):
+    """
+    Run one transposed direct-form II section [b0, b1, b2, a1, a2] over the block x.
+    'state' (length 2) is read and updated in place, so consecutive blocks join
+    seamlessly.
+
+    The recurrence is written in state-space form
+        s[n+1] = A s[n] + B x[n],   y[n] = b0 x[n] + s[n][0]
+    with A = [[-a1, 1], [-a2, 0]] and B = [b1 - a1*b0, b2 - a2*b0], and evaluated
+    as a parallel prefix scan, so the whole block is processed with array ops.
+
+    Each coefficient may also be an array with one value per sample, which runs
+    the section as a time-varying filter (used while a parameter is gliding).
+
+    The float64 result goes to 'out' if given (it may be x itself); work arrays
+    come from 'scratch' (a ScratchBuffers), so fixed coefficients allocate nothing.
+    """
+    b0, b1, b2, a1, a2 = coeffs
+    n = x.shape[0]
+    if out is None:
+        out = np.empty(n, dtype=np.float64)
+    if scratch is None:
+        scratch = ScratchBuffers()
+    varying = np.ndim(a1) > 0
+
+    xf = scratch.get('section_x', n)
+    np.copyto(xf, x)
+    tmp = (scratch.get('section_t0', n), scratch.get('section_t1', n), scratch.get('section_t2', n))
+    u0 = scratch.get('section_u0', n)
+    y = out
+
+    if not np.any(a2) and not np.any(b2):
+        # First-order section: only s1 is non-zero
+        np.multiply(xf, b1 - a1 * b0, out=u0)
+        u0[0] += -(a1[0] if varying else a1) * state[0]
+        _scan_first_order(u0, -a1, tmp[0])
+        y[0] = state[0]
+        y[1:] = u0[:-1]
+        state[0] = u0[-1]
+        state[1] = 0.0
+    else:
+        u1 = scratch.get('section_u1', n)
+        np.multiply(xf, b1 - a1 * b0, out=u0)
+        np.multiply(xf, b2 - a2 * b0, out=u1)
+        s0, s1 = state[0], state[1]
+        if varying:
+            u0[0] += -a1[0] * s0 + s1
+            u1[0] += -a2[0] * s0
+            _scan_second_order_varying(u0, u1, -a1, np.ones(n), -a2, np.zeros(n))
+        else:
+            u0[0] += -a1 * s0 + s1
+            u1[0] += -a2 * s0
+            _scan_second_order(u0, u1, ((-a1, 1.0), (-a2, 0.0)), tmp)
+        y[0] = s0
+        y[1:] = u0[:-1]
+        state[0] = u0[-1]
+        state[1] = u1[-1]
+
+    np.multiply(xf, b0, out=tmp[0])
+    y += tmp[0]
+    return y
+
+
+class BiquadCascade:
+    """
+    A chain of second-order sections with persistent state, processed a block
+    at a time. Coefficients are swapped atomically by set_sections(...), so the
+    UI thread can retune the filter while the audio thread is running it.
+    """
+    def __init__(self, sections=None):
+        self.sections = np.zeros((0, 5), dtype=np.float64)
+        self.state = np.zeros((0, 2), dtype=np.float64)
+        # Work arrays reused from block to block
+        self._scratch = ScratchBuffers()
+        if sections is not None:
+            self.set_sections(sections)
+
+    def set_sections(self, sections):
+        self.sections = np.atleast_2d(np.asarray(sections, dtype=np.float64))
+
+    def reset(self):
+        self.state = np.zeros((self.sections.shape[0], 2), dtype=np.float64)
+
+    def process(self, x, varying_sections=None, out=None):
+        """
+        Filter the block x and return it as float32 (in 'out' if given).
+        'varying_sections' optionally gives per-sample coefficients, shape
+        (len(x), num_sections, 5), overriding self.sections for this block.
+        """
+        sections = self.sections
+        if self.state.shape[0] != sections.shape[0]:
+            # Section count changed (e.g. a new slope): start those sections from rest
+            self.state = np.zeros((sections.shape[0], 2), dtype=np.float64)
+        num_samples = x.shape[0]
+        if out is None:
+            out = np.empty(num_samples, dtype=np.float32)
+        if num_samples == 0:
+            return out
+
+        scratch = self._scratch
+        y = x
+        for index in range(sections.shape[0]):
+            if varying_sections is not None:
+                coeffs = varying_sections[:, index, :].T
+            else:
+                coeffs = sections[index]
+            target = scratch.get('cascade_y', num_samples)
+            y = process_section(y, coeffs, self.state[index], out=target, scratch=scratch)
+        np.copyto(out, y)
+        return out
+
+
+# ─────────────────────────────────────────────────────────
+# Coefficient design (RBJ audio-EQ cookbook + the original 1-pole filters)
+# ─────────────────────────────────────────────────────────
+# Every function below accepts scalars or arrays of cutoffs/resonances (one per
+# control period) and returns coefficients with a trailing axis of 5.
+def _clamp_cutoff(cutoff, sample_rate):
+    return np.clip(np.asarray(cutoff, dtype=np.float64), 1.0, 0.49 * sample_rate)
+
+
+def _coefficients(b0, b1, b2, a1, a2):
+    return np.stack(np.broadcast_arrays(b0, b1, b2, a1, a2), axis=-1).astype(np.float64)
+
+
+def _biquad(kind, cutoff, sample_rate, q):
+    w0 = 2.0 * np.pi * _clamp_cutoff(cutoff, sample_rate) / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2.0 * np.maximum(q, 0.05))
+
+    if kind == 'lowpass':
+        b = ((1.0 - cos_w0) / 2.0, 1.0 - cos_w0, (1.0 - cos_w0) / 2.0)
+    elif kind == 'highpass':
+        b = ((1.0 + cos_w0) / 2.0, -(1.0 + cos_w0), (1.0 + cos_w0) / 2.0)
+    else:
+        # band-pass, 0 dB peak gain
+        b = (alpha, 0.0, -alpha)
+    a0 = 1.0 + alpha
+    return _coefficients(b[0] / a0, b[1] / a0, b[2] / a0, (-2.0 * cos_w0) / a0, (1.0 - alpha) / a0)
+
+
+def _one_pole(kind, cutoff, sample_rate):
+    if kind == 'lowpass':
+        # y = y + alpha * (x - y), alpha = 1 - exp(-2*pi*cutoff/fs)
+        alpha = 1.0 - np.exp(-2.0 * np.pi * cutoff / sample_rate)
+        return _coefficients(alpha, 0.0, 0.0, -(1.0 - alpha), 0.0)
+    # y[n] = alpha * (y[n-1] + x[n] - x[n-1]), alpha = exp(-2*pi*cutoff/fs)
+    alpha = np.exp(-2.0 * np.pi * cutoff / sample_rate)
+    return _coefficients(alpha, -alpha, 0.0, -alpha, 0.0)
+
+
+def design_sections(kind, cutoff, sample_rate, slope=12, resonance=_BUTTERWORTH_Q2):
+    """
+    Section coefficients for a 'lowpass', 'highpass' or 'bandpass' response.
+      - slope 6: the original 1-pole filters (no resonance; not for band-pass),
+      - slope 12: one resonant biquad (Q = resonance),
+      - slope 24: two cascaded biquads; for low/high-pass the Butterworth Q pair
+        with the resonance applied to the peaking section.
+    Scalar inputs give shape (num_sections, 5); arrays of K cutoffs/resonances
+    give (K, num_sections, 5).
+    """
+    # Either may glide alone: every section gets their common (K,) shape, also
+    # those that ignore the resonance (1-pole, fixed-Q Butterworth section)
+    cutoff, resonance = np.broadcast_arrays(np.asarray(cutoff, dtype=np.float64),
+                                            np.asarray(resonance, dtype=np.float64))
+    if slope == 6 and kind != 'bandpass':
+        return np.stack([_one_pole(kind, cutoff, sample_rate)], axis=-2)
+
+    if slope == 24:
+        if kind == 'bandpass':
+            qs = (resonance, resonance)
+        else:
+            low_q, high_q = _BUTTERWORTH_Q4
+            qs = (np.full_like(resonance, low_q), high_q * resonance / _BUTTERWORTH_Q2)
+        return np.stack([_biquad(kind, cutoff, sample_rate, q) for q in qs], axis=-2)
+
+    return np.stack([_biquad(kind, cutoff, sample_rate, resonance)], axis=-2)
@@ -0,0 +1,89 @@
+# modules/FilterModule.py
+
+from .module import Module
+from .buffers import silence
+from .filter_engine import BiquadCascade, design_sections, FILTER_SLOPES
+from .smoothing import SmoothedParameter, DEFAULT_CONTROL_RATE
+
+
+class FilterModule(Module):
+    """
+    Shared body of the low-, high- and band-pass filter modules.
+
+    Cutoff and resonance are SmoothedParameters: the setters only store a target,
+    and the audio thread glides towards it. While a glide is running the
+    coefficients are redesigned once per control period (vectorized over the
+    block) and the cascade runs them as a time-varying filter; once settled the
+    last coefficients are reused and nothing is recomputed.
+    """
+    kind = 'lowpass'
+    slopes = FILTER_SLOPES
+    accepts_out = True
+
+    def __init__(self, cutoff, sample_rate, slope, resonance, control_rate=DEFAULT_CONTROL_RATE):
+        self.cutoff = cutoff
+        self.sample_rate = sample_rate
+        self.slope = slope if slope in self.slopes else self.slopes[0]
+        self.resonance = resonance
+        self.cutoff_param = SmoothedParameter(cutoff, sample_rate, control_rate=control_rate)
+        self.resonance_param = SmoothedParameter(resonance, sample_rate, control_rate=control_rate)
+        self.filter = BiquadCascade()
+        self._update_coefficients()
+
+    def _update_coefficients(self):
+        self._designed_slope = self.slope
+        self.filter.set_sections(
+            design_sections(self.kind, self.cutoff_param.value, self.sample_rate,
+                            self.slope, self.resonance_param.value)
+        )
+
+    def set_cutoff(self, new_cutoff: float):
+        """
+        Called by ModuleFrame's cutoff slider callbacks.
+        Only sets the target; the filter glides there at control rate.
+        """
+        self.cutoff = new_cutoff
+        self.cutoff_param.set_target(new_cutoff)
+
+    def set_slope(self, new_slope: int):
+        """
+        Steepness in dB/octave (one of self.slopes); applied at the next block.
+        """
+        if new_slope in self.slopes:
+            self.slope = new_slope
+
+    def set_resonance(self, new_resonance: float):
+        """
+        Q of the resonant section(s); glides like the cutoff.
+        """
+        self.resonance = max(0.1, new_resonance)
+        self.resonance_param.set_target(self.resonance)
+
+    def generate(self, num_samples: int, input_audio=None, out=None):
+        """
+        Processes 'input_audio' with the filter (into 'out' if given).
+        If 'input_audio' is None, the filter runs on silence: its state decays
+        as it would with real input, instead of freezing and coming back as a
+        click when input returns (e.g. after the chain is rearranged).
+        """
+        if input_audio is None:
+            input_audio = silence(num_samples)
+
+        num_samples = input_audio.shape[0]
+        cutoffs = self.cutoff_param.control_values(num_samples)
+        resonances = self.resonance_param.control_values(num_samples)
+        if cutoffs is None and resonances is None:
+            if self._designed_slope != self.slope:
+                self._update_coefficients()
+            return self.filter.process(input_audio, out=out)
+
+        # Gliding: one design per control period, held for that period
+        if cutoffs is None:
+            cutoffs = self.cutoff_param.value
+        if resonances is None:
+            resonances = self.resonance_param.value
+        sections = design_sections(self.kind, cutoffs, self.sample_rate, self.slope, resonances)
+        self._designed_slope = self.slope
+        self.filter.set_sections(sections[-1])
+        per_sample = self.cutoff_param.hold_per_sample(sections, num_samples)
+        return self.filter.process(input_audio, per_sample, out=out)
@@ -0,0 +1,152 @@
+# modules/lfo.py
+
+import functools
+
+import numpy as np
+from .buffers import ScratchBuffers, sample_ramp
+from .smoothing import SmoothedParameter
+
+LFO_WAVES = ('sine', 'square', 'triangle', 'sawtooth')
+
+# Points per LFO cycle; linear interpolation between them keeps the sine
+# within ~1e-6 of the exact value
+LFO_TABLE_SIZE = 2048
+
+
+@functools.lru_cache(maxsize=None)
+def get_lfo_table(wave):
+    """
+    One cycle of an LFO shape (values in [-1, 1]), with a wrap-around guard point.
+    Built once per shape, so every waveform costs the same gather at render time.
+    """
+    phase = 2.0 * np.pi * np.arange(LFO_TABLE_SIZE + 1) / LFO_TABLE_SIZE
+    if wave == 'square':
+        # Soft-edged square, same as the original tanh(20 * sin)
+        table = np.tanh(20.0 * np.sin(phase))
+    elif wave == 'triangle':
+        table = (2.0 / np.pi) * np.arcsin(np.sin(phase))
+    elif wave == 'sawtooth':
+        # The original 20-term Fourier series, evaluated once for the whole table
+        n = np.arange(1, 21)[:, None]
+        table = (2.0 / np.pi) * np.sum(((-1.0) ** (n + 1) / n) * np.sin(n * phase), axis=0)
+    else:
+        table = np.sin(phase)
+    table.setflags(write=False)
+    return table
+
+
+# Largest |value| of any shape (the Fourier sawtooth overshoots 1 slightly);
+# modules that turn the LFO into a delay size their buffers with it
+LFO_PEAK = max(float(np.max(np.abs(get_lfo_table(wave)))) for wave in LFO_WAVES)
+
+
+class LFO:
+    """
+    Block-based low-frequency oscillator shared by the modulation modules.
+
+    render(num_samples) returns the modulation for a whole block in one pass:
+    the phase of every sample comes from a cumulative sum of the (smoothed) rate,
+    and the values are gathered from the shape's cached table.
+    """
+    def __init__(self, sample_rate=44100, rate=5.0, wave='sine'):
+        self.sample_rate = sample_rate
+        self.rate = max(0.0, rate)
+        self.rate_param = SmoothedParameter(self.rate, sample_rate)
+        self.phase = 0.0  # position in the cycle, 0..1
+        # Note division per cycle when synced to the transport, else None
+        self.sync_division = None
+        self.wave = 'sine'
+        self.set_wave(wave)
+        self._scratch = ScratchBuffers()
+
+    def set_rate(self, new_rate: float):
+        """
+        LFO speed in Hz; glides to the new value.
+        """
+        self.rate = max(0.0, new_rate)
+        if self.sync_division is None:
+            self.rate_param.set_target(self.rate)
+
+    def set_sync(self, division):
+        """
+        One cycle per note division of the transport ("1/4", "1/8T", ...),
+        or None to run free at 'rate' Hz.
+        """
+        self.sync_division = division
+        if division is None:
+            self.rate_param.set_target(self.rate)
+
+    def sync_transport(self, transport):
+        """
+        Called once per block with the engine transport: a synced LFO takes its
+        rate from the tempo and its phase from the beat position.
+        """
+        if self.sync_division is None:
+            return
+        cycle_samples = transport.division_samples(self.sync_division)
+        if cycle_samples is None:
+            return
+        cycle_beats = cycle_samples / transport.samples_per_beat
+        self.rate_param.set_immediate(self.sample_rate / cycle_samples)
+        self.phase = (transport.block_start_beat / cycle_beats) % 1.0
+
+    def set_wave(self, wave: str):
+        """
+        Selects the LFO shape; unknown names fall back to sine.
+        """
+        wave = wave.lower()
+        if wave in LFO_WAVES:
+            self.wave = wave
+        else:
+            print(f"Unknown wave type {wave}; defaulting to sine.")
+            self.wave = 'sine'
+
+    def reset(self):
+        self.phase = 0.0
+
+    def render(self, num_samples: int, out=None):
+        """
+        Returns 'num_samples' LFO values in [-1, 1] (float64, written into 'out'
+        if given) and advances the phase.
+        """
+        if out is None:
+            out = np.empty(num_samples, dtype=np.float64)
+        if num_samples == 0:
+            return out
+        scratch = self._scratch
+        positions = scratch.get('positions', num_samples)
+
+        rates = self.rate_param.ramp(num_samples)
+        if np.ndim(rates) == 0:
+            increment = rates / self.sample_rate
+            np.multiply(sample_ramp(num_samples), increment, out=positions)
+            next_phase = self.phase + increment * num_samples
+        else:
+            increments = rates / self.sample_rate
+            np.cumsum(increments, out=positions)
+            next_phase = self.phase + positions[-1]
+            positions -= increments
+        positions += self.phase
+        self.phase = next_phase % 1.0
+
+        # Fractional table position of every sample (floors are taken in float,
+        # so no operation mixes integer and float arrays)
+        low = scratch.get('low', num_samples)
+        np.floor(positions, out=low)
+        positions -= low
+        positions *= LFO_TABLE_SIZE
+        np.floor(positions, out=low)
+        np.minimum(low, LFO_TABLE_SIZE - 1, out=low)
+        frac = positions
+        frac -= low
+        index = scratch.get('index', num_samples, np.intp)
+        np.copyto(index, low, casting='unsafe')
+
+        table = get_lfo_table(self.wave)
+        np.take(table, index, out=low, mode='clip')
+        index += 1
+        np.take(table, index, out=out, mode='clip')
+        out -= low
+        out *= frac
+        out += low
+        return out
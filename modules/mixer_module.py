@@ -0,0 +1,56 @@
+# modules/MixerModule.py
+
+import numpy as np
+from .module import Module
+from .buffers import ScratchBuffers
+from .smoothing import SmoothedParameter
+
+class MixerModule(Module):
+    """
+    Sums several inputs, each at its own level.
+
+    In a ProcessingGraph every input is a separate port (num_inputs of them) and
+    generate(...) receives a tuple with one block per port (None where nothing
+    is connected). In the linear chain it has a single input.
+    """
+    accepts_out = True
+
+    def __init__(self, num_inputs=2, sample_rate=44100, levels=None):
+        self.sample_rate = sample_rate
+        self.num_inputs = max(1, int(num_inputs))
+        levels = list(levels) if levels is not None else []
+        levels += [1.0] * (self.num_inputs - len(levels))
+        self.levels = [max(0.0, float(level)) for level in levels[:self.num_inputs]]
+        # Levels glide to new values instead of stepping
+        self.level_params = [SmoothedParameter(level, sample_rate) for level in self.levels]
+        self._scratch = ScratchBuffers()
+
+    def set_level(self, index, level):
+        """
+        Level of input 'index' (0-based), 0.0 and up.
+        """
+        if not 0 <= index < self.num_inputs:
+            print(f"Mixer has no input {index}; it has {self.num_inputs}.")
+            return
+        self.levels[index] = max(0.0, float(level))
+        self.level_params[index].set_target(self.levels[index])
+
+    def generate(self, num_samples, input_audio=None, out=None):
+        inputs = input_audio if isinstance(input_audio, tuple) else (input_audio,)
+        if out is None:
+            out = np.zeros(num_samples, dtype=np.float32)
+        else:
+            out.fill(0.0)
+
+        term = self._scratch.get('term', num_samples, out.dtype)
+        for audio, level_param in zip(inputs, self.level_params):
+            level = level_param.ramp(num_samples)
+            if audio is None:
+                continue
+            if np.ndim(level) == 0 and level == 1.0:
+                out += audio
+            else:
+                np.multiply(audio, level if np.ndim(level) else float(level), out=term,
+                            casting='same_kind')
+                out += term
+        return out
@@ -4,12 +4,30 @@ class Module:
     """
     Base class for all synthesizer modules.
     Each module has a `generate(num_samples, input_audio=None)` method.
+
+    Modules that set `accepts_out = True` also take an optional `out` argument
+    (subclasses that do not are simply called without it):
+    a preallocated float32 buffer of num_samples (owned by ModuleChainManager,
+    never the same memory as input_audio). Such a module writes its result into
+    `out` and returns it, or returns input_audio itself if it leaves the audio
+    untouched, so the chain runs without allocating a new array per module.
+
+    input_audio is read-only to every module: in a ProcessingGraph one buffer
+    may feed several modules, possibly at the same time (ParallelRenderer).
     """
-    def generate(self, num_samples, input_audio=None):
+    accepts_out = False
+    # MIDI channel (0-15) a note receiver listens to; None for all of them
+    # (see synthesizer.note_routing)
+    midi_channel = None
+
+    def generate(self, num_samples, input_audio=None, out=None):
         """
         Default behavior: if input_audio is given, pass it through unchanged;
         if no input is given, return silence.
         """
         if input_audio is None:
-            return np.zeros(num_samples, dtype=np.float32)
+            if out is None:
+                return np.zeros(num_samples, dtype=np.float32)
+            out.fill(0.0)
+            return out
         return input_audio
@@ -0,0 +1,87 @@
+# modules/oscillator.py
+
+import numpy as np
+
+from .buffers import sample_ramp
+
+TWO_PI = 2.0 * np.pi
+
+WAVEFORMS = ('sine', 'square', 'triangle', 'sawtooth')
+
+
+def advance_phase(phase, phase_inc, num_samples, out=None, wrap=True, scratch=None):
+    """
+    Block phase accumulator.
+
+    Returns (phases, next_phase):
+      - phases: the phase (radians, wrapped to [0, 2π)) of every sample in the block,
+      - next_phase: the phase the following block should start from.
+
+    'phase' and 'phase_inc' may be scalars or arrays of the same shape (one entry per
+    voice); the block axis is appended last, so N voices give an (N, num_samples) array.
+    'out' receives the phases if given; wrap=False skips the wrap for readers that
+    wrap the phase themselves (the wavetable reader masks its table index).
+    'scratch' (a ScratchBuffers) holds the per-voice values expanded to the block
+    and next_phase, so the arithmetic runs on same-shape arrays, NumPy needs no
+    iterator buffers and nothing is allocated per voice.
+    """
+    phase = np.asarray(phase, dtype=np.float64)
+    phase_inc = np.asarray(phase_inc, dtype=np.float64)
+
+    if out is None:
+        out = np.empty(phase.shape + (num_samples,), dtype=np.float64)
+    phases = out
+    if scratch is None:
+        expanded = np.empty_like(phases)
+    else:
+        expanded = scratch.get('phase_expanded', phases.shape, np.float64)
+    np.copyto(phases, sample_ramp(num_samples))
+    np.copyto(expanded, phase_inc[..., None])
+    phases *= expanded
+    np.copyto(expanded, phase[..., None])
+    phases += expanded
+    if wrap:
+        np.mod(phases, TWO_PI, out=phases)
+
+    if scratch is None:
+        next_phase = np.mod(phase + phase_inc * num_samples, TWO_PI)
+    else:
+        next_phase = scratch.get('phase_next', phase.shape, np.float64)
+        np.multiply(phase_inc, num_samples, out=next_phase)
+        np.add(phase, next_phase, out=next_phase)
+        np.mod(next_phase, TWO_PI, out=next_phase)
+    return phases, next_phase
+
+
+def render_waveform(waveform, phases, out=None):
+    """
+    Map a block of phases (radians in [0, 2π)) to waveform values in [-1, 1].
+    Matches the per-sample formulas the voices used before, without any trig
+    for the non-sine shapes. Unknown waveforms render silence.
+    With a float64 'out' no temporary arrays are created.
+    """
+    if out is None:
+        out = np.empty(phases.shape, dtype=np.float64)
+
+    if waveform == 'sine':
+        np.sin(phases, out=out)
+    elif waveform == 'square':
+        # sin(phase) >= 0  <=>  phase in [0, π]  <=>  π - phase is +0 or positive
+        np.subtract(np.pi, phases, out=out)
+        np.copysign(1.0, out, out=out)
+    elif waveform == 'triangle':
+        # (2/π) * asin(sin(phase)), written as a folded ramp
+        frac = out if out.dtype == np.float64 else np.empty(phases.shape, dtype=np.float64)
+        np.divide(phases, TWO_PI, out=frac)
+        frac += 0.75
+        np.mod(frac, 1.0, out=frac)
+        frac -= 0.5
+        np.abs(frac, out=frac)
+        np.multiply(frac, 4.0, out=out)
+        out -= 1.0
+    elif waveform == 'sawtooth':
+        np.divide(phases, np.pi, out=out)
+        out -= 1.0
+    else:
+        out.fill(0.0)
+    return out
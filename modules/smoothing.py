@@ -0,0 +1,90 @@
+# modules/smoothing.py
+
+import numpy as np
+
+# Samples between coefficient updates while a parameter is gliding
+DEFAULT_CONTROL_RATE = 32
+# Time a parameter takes to glide to a new target (seconds)
+DEFAULT_SMOOTHING_TIME = 0.02
+
+
+class SmoothedParameter:
+    """
+    A control value that glides linearly to its target instead of stepping.
+
+    set_target(...) is all the UI thread does: it stores the newest value, so a
+    burst of slider events between two blocks collapses into a single target.
+    The audio thread then reads the glide a block at a time, either per sample
+    (ramp) or once every 'control_rate' samples (control_values), which is what
+    coefficient-based modules use to avoid per-sample recomputation.
+    """
+    def __init__(self, value, sample_rate=44100, smoothing_time=DEFAULT_SMOOTHING_TIME,
+                 control_rate=DEFAULT_CONTROL_RATE):
+        self.sample_rate = sample_rate
+        self.control_rate = max(1, int(control_rate))
+        self.smoothing_samples = max(1, int(smoothing_time * sample_rate))
+
+        self.value = float(value)
+        self.target = float(value)
+        self._glide_target = float(value)
+        self._delta = 0.0  # change per sample of the current glide
+
+    def set_target(self, value):
+        self.target = float(value)
+
+    def set_immediate(self, value):
+        """
+        Jump to 'value' without gliding (e.g. when the module is created).
+        """
+        self.value = self.target = self._glide_target = float(value)
+        self._delta = 0.0
+
+    @property
+    def settled(self):
+        return self.value == self.target
+
+    def _values_at(self, offsets):
+        """
+        Values of the glide 'offsets' samples from now (read-only on the state).
+        """
+        target = self.target
+        if target != self._glide_target:
+            self._glide_target = target
+            self._delta = (target - self.value) / self.smoothing_samples
+
+        values = self.value + self._delta * offsets
+        if self._delta > 0:
+            np.minimum(values, target, out=values)
+        else:
+            np.maximum(values, target, out=values)
+        return values
+
+    def ramp(self, num_samples):
+        """
+        Per-sample values for the next block, or the plain float when settled.
+        """
+        if self.settled or num_samples == 0:
+            return self.value
+        values = self._values_at(np.arange(1, num_samples + 1, dtype=np.float64))
+        self.value = float(values[-1])
+        return values
+
+    def control_values(self, num_samples):
+        """
+        One value per 'control_rate' samples of the next block (taken at the end of
+        each control period), or None when settled.
+        """
+        if self.settled or num_samples == 0:
+            return None
+        count = -(-num_samples // self.control_rate)
+        offsets = np.minimum(np.arange(1, count + 1) * self.control_rate, num_samples).astype(np.float64)
+        values = self._values_at(offsets)
+        self.value = float(values[-1])
+        return values
+
+    def hold_per_sample(self, control_values, num_samples):
+        """
+        Expand control_values(...) to one entry per sample (each value is held for
+        its control period).
+        """
+        return np.repeat(control_values, self.control_rate, axis=0)[:num_samples]
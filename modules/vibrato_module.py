@@ -1,113 +1,83 @@
 # modules/VibratoModule.py
 
-import numpy as np
-import math
 from .module import Module
+from .buffers import ScratchBuffers, silence
+from .lfo import LFO, LFO_PEAK
+from .delay_line import DelayLine
+from .smoothing import SmoothedParameter
 
 class VibratoModule(Module):
     """
     A vibrato effect by modulating a short delay line.
-    'depth_ms' sets how many ms we modulate around base_delay_ms,
-    'lfo_rate' sets the LFO speed in Hz.
+    'depth_ms' sets how many ms we modulate around base_delay_ms (up to
+    'max_depth_ms', which sizes the delay line), 'lfo_rate' sets the LFO speed in Hz.
     """
-    def __init__(self, sample_rate=44100, base_delay_ms=10.0, depth_ms=1.0, lfo_rate=5.0, wave='sine'):
+    accepts_out = True
+
+    def __init__(self, sample_rate=44100, base_delay_ms=10.0, depth_ms=1.0, lfo_rate=5.0, wave='sine',
+                 max_depth_ms=10.0):
         self.sample_rate = sample_rate
         self.base_delay_ms = base_delay_ms
+        self.max_depth_ms = max(max_depth_ms, depth_ms)
         self.depth_ms = depth_ms
         self.lfo_rate = lfo_rate
-        self.wave = wave  # 'sine', 'square', 'triangle', 'sawtooth'
-        
-        # ring buffer for delay line processing
-        self.ring_buffer_size = int(sample_rate * 2.0)  # 2-second buffer
-        self.ring_buffer = np.zeros(self.ring_buffer_size, dtype=np.float32)
-        self.write_ptr = 0
-        self.phase = 0.0
+        # LFO waveform: 'sine', 'square', 'triangle', 'sawtooth'
+        self.lfo = LFO(sample_rate, lfo_rate, wave)
+        self.wave = self.lfo.wave
+        # Depth glides to new slider values instead of stepping
+        self.depth_param = SmoothedParameter(depth_ms, sample_rate)
+
+        # Delay line just long enough for the deepest modulation
+        max_delay_ms = base_delay_ms + self.max_depth_ms * LFO_PEAK
+        self.delay_line = DelayLine(max_delay_ms * 0.001 * sample_rate)
+        self._scratch = ScratchBuffers()
 
     def set_depth_ms(self, new_depth_ms: float):
         """
         Called by 'on_vibrato_depth_change' to update vibrato depth in milliseconds.
         """
-        self.depth_ms = max(0.0, new_depth_ms)
+        self.depth_ms = max(0.0, min(self.max_depth_ms, new_depth_ms))
+        self.depth_param.set_target(self.depth_ms)
 
     def set_rate(self, new_rate: float):
         """
         Called by 'on_vibrato_freq_change' to update LFO rate in Hz.
         """
         self.lfo_rate = max(0.0, new_rate)
+        self.lfo.set_rate(self.lfo_rate)
     
-    def set_wave_type(self, wave_type: str):
+    def set_sync(self, division):
         """
-        Updates the LFO waveform type.
+        Sync the LFO to a note division of the transport (e.g. "1/8"), or None
+        for the free-running 'lfo_rate'.
         """
-        allowed_waves = ['sine', 'square', 'triangle', 'sawtooth']
-        if wave_type.lower() in allowed_waves:
-            self.wave = wave_type.lower()
-        else:
-            print(f"Unknown wave type {wave_type}; defaulting to sine.")
-            self.wave = 'sine'
+        self.lfo.set_sync(division)
 
-    def _lfo_value(self, phase: float) -> float:
+    def sync_transport(self, transport):
+        self.lfo.sync_transport(transport)
+
+    def set_wave_type(self, wave_type: str):
         """
-        Returns the LFO modulation value (in the range -1 to 1)
-        based on the current phase and selected waveform.
+        Updates the LFO waveform type.
         """
-        if self.wave == 'sine':
-            return math.sin(phase)
-        elif self.wave == 'square':
-            return math.tanh(20 * math.sin(phase))
-        elif self.wave == 'triangle':
-            # Normalize the result of arcsine to get a triangle waveform in the range [-1, 1].
-            return (2.0 / math.pi) * math.asin(math.sin(phase))
-        elif self.wave == 'sawtooth':
-            # Normalize phase t to the range [0, 1)
-            t = (phase % (2 * math.pi)) / (2 * math.pi)
-            return (2.0 / math.pi) * math.fsum(((-1)**(n+1) / n) * math.sin(2 * math.pi * n * t) for n in range(1, 21))
-        else:
-            # default to sine wave
-            return math.sin(phase)
+        self.lfo.set_wave(wave_type)
+        self.wave = self.lfo.wave
 
-    def generate(self, num_samples: int, input_audio=None):
+    def generate(self, num_samples: int, input_audio=None, out=None):
         """
         Processes input audio by modulating a short delay line with vibrato.
-        If input_audio is None, returns zeros.
+        If input_audio is None, the delay line runs on silence, so whatever
+        it still holds plays out instead of waiting for the next input.
         """
         if input_audio is None:
-            return np.zeros(num_samples, dtype=np.float32)
-
-        out = np.zeros(num_samples, dtype=input_audio.dtype)
-        phase_inc = 2.0 * math.pi * self.lfo_rate / self.sample_rate
-
-        base_delay_samples = self.base_delay_ms * 0.001 * self.sample_rate
-        depth_samples = self.depth_ms * 0.001 * self.sample_rate
-
-        for i in range(num_samples):
-            # Write the current sample into the ring buffer.
-            self.ring_buffer[self.write_ptr] = input_audio[i]
-
-            # Calculate modulation value based on the chosen LFO wave.
-            mod_value = self._lfo_value(self.phase)
-            # Compute delay in samples (modulated around the base delay).
-            delay = base_delay_samples + depth_samples * mod_value
-
-            # Compute the read pointer for the delay line.
-            read_ptr = self.write_ptr - delay
-            read_ptr = (read_ptr + 2 * self.ring_buffer_size) % self.ring_buffer_size
-
-            # Linear interpolation for smoother delay effect.
-            r_floor = int(np.floor(read_ptr))
-            r_ceil = (r_floor + 1) % self.ring_buffer_size
-            frac = read_ptr - r_floor
-
-            s_floor = self.ring_buffer[r_floor]
-            s_ceil = self.ring_buffer[r_ceil]
-            out[i] = (1.0 - frac) * s_floor + frac * s_ceil
-
-            # Update the write pointer.
-            self.write_ptr = (self.write_ptr + 1) % self.ring_buffer_size
+            input_audio = silence(num_samples)
 
-            # Increment phase and keep it within 0 to 2π.
-            self.phase += phase_inc
-            if self.phase >= 2.0 * math.pi:
-                self.phase -= 2.0 * math.pi
+        num_samples = input_audio.shape[0]
+        # Delay in samples for every output sample, modulated around the base delay
+        delays = self.lfo.render(num_samples, out=self._scratch.get('delays', num_samples))
+        delays *= self.depth_param.ramp(num_samples) * 0.001 * self.sample_rate
+        delays += self.base_delay_ms * 0.001 * self.sample_rate
 
-        return out
+        if out is None:
+            return self.delay_line.process(input_audio, delays).astype(input_audio.dtype, copy=False)
+        return self.delay_line.process(input_audio, delays, out=out)
@@ -0,0 +1,342 @@
+# modules/voice_bank.py
+
+import heapq
+
+import numpy as np
+
+from .buffers import ScratchBuffers, sample_ramp
+from .envelope import get_envelope_shape
+from .oscillator import TWO_PI, advance_phase, render_waveform
+from .wavetable import render_wavetable
+
+# Envelope stages, stored per voice in VoiceBank.env_state
+ENV_OFF = 0
+ENV_ATTACK = 1   # attack, decay and sustain: a position in shape.attack_decay
+ENV_RELEASE = 2  # a position in shape.release, scaled by release_level
+
+# Voice stealing policies for VoiceBank.allocate
+STEAL_POLICIES = ('released-first', 'oldest', 'quietest')
+
+
+class VoiceBank:
+    """
+    Struct-of-arrays storage for all voices of a PolySynthModule.
+
+    Every per-voice value (note, frequency, phase, envelope position, level) lives
+    in a preallocated array indexed by voice slot. The ADSR ramps themselves are a
+    cached EnvelopeShape shared by all voices (see modules/envelope.py). render(...) evaluates all
+    sounding voices as one (voices x samples) computation and reduces them to the
+    mix with a single dot product, so the Python overhead per block does not grow
+    with the number of voices.
+
+    Slots are handed out from a free list; when none is free, allocate(...) steals
+    one according to a policy. Start and release order are kept in lazily-
+    invalidated heaps, so allocation stays O(1) / O(log n) under note floods;
+    'quietest' takes a single argmin over the envelope levels instead (see there).
+    """
+    def __init__(self, num_voices=8, sample_rate=44100, level=0.1):
+        self.num_voices = num_voices
+        self.sample_rate = sample_rate
+
+        self.note = np.full(num_voices, -1, dtype=np.int64)
+        self.frequency = np.full(num_voices, 440.0, dtype=np.float64)
+        self.phase = np.zeros(num_voices, dtype=np.float64)
+        self.level = np.full(num_voices, level, dtype=np.float64)
+
+        # Envelope state
+        self.env_state = np.full(num_voices, ENV_OFF, dtype=np.int8)
+        self.env_position = np.zeros(num_voices, dtype=np.int64)
+        self.env_amplitude = np.zeros(num_voices, dtype=np.float64)
+        self.release_level = np.zeros(num_voices, dtype=np.float64)
+        self.shape = None
+        # Shape set by set_adsr, switched to by the next render()
+        self._pending_shape = None
+        self.set_adsr(0.01, 0.1, 0.8, 0.2)
+
+        # Allocation bookkeeping
+        self.free_slots = list(range(num_voices - 1, -1, -1))
+        self._counter = 0
+        # Order stamps (-1 = not in that state); heap entries whose stamp no longer
+        # matches the slot's current stamp are stale and skipped when popped
+        self.start_order = np.full(num_voices, -1, dtype=np.int64)
+        self.release_order = np.full(num_voices, -1, dtype=np.int64)
+        self._started_heap = []
+        self._released_heap = []
+
+        # Work arrays for render(), reused from block to block: block-sized ones
+        # in _scratch, per-voice ones (slot lists, gathered voice values) below
+        self._scratch = ScratchBuffers()
+        self._slot_ids = np.arange(num_voices, dtype=np.int64)
+        self._slots = np.empty(num_voices, dtype=np.int64)
+        self._finished = np.empty(num_voices, dtype=np.int64)
+        self._masks = np.empty((3, num_voices), dtype=bool)
+        self._voice_state = np.empty(num_voices, dtype=np.int8)
+        self._voice_int = np.empty(num_voices, dtype=np.int64)
+        self._voice_float = np.empty((4, num_voices), dtype=np.float64)
+        self._voice_level = np.empty(num_voices, dtype=np.float32)
+
+    # ─────────────────────────────────────────────────────────
+    # Slot allocation / voice stealing
+    # ─────────────────────────────────────────────────────────
+    def allocate(self, policy='released-first'):
+        """
+        Return (slot, stolen_note) for a new note. stolen_note is the note whose
+        voice was taken over, or None if a free slot was available.
+
+        Policies:
+          - 'released-first': the longest-released voice, else the oldest one,
+          - 'oldest': the voice started longest ago,
+          - 'quietest': the voice with the lowest current envelope level.
+        """
+        if self.free_slots:
+            return self.free_slots.pop(), None
+
+        slot = None
+        if policy == 'quietest':
+            # Every voice's level changes every block, so a heap ordered by level
+            # would be stale after each render and need an O(n) rebuild per block;
+            # one vectorized argmin per steal costs less (about the same 2 us from
+            # 8 to 256 voices, where a rebuild already takes 10 us at 64)
+            slot = int(np.argmin(self.env_amplitude))
+        elif policy == 'released-first':
+            slot = self._pop_heap(self._released_heap, self.release_order)
+        if slot is None:
+            slot = self._pop_heap(self._started_heap, self.start_order)
+        if slot is None:
+            slot = 0
+
+        stolen_note = int(self.note[slot])
+        return slot, (stolen_note if stolen_note >= 0 else None)
+
+    @staticmethod
+    def _pop_heap(heap, order):
+        while heap:
+            stamp, slot = heapq.heappop(heap)
+            if order[slot] == stamp:
+                return slot
+        return None
+
+    def _push_order(self, heap, order, slot):
+        self._counter += 1
+        order[slot] = self._counter
+        heapq.heappush(heap, (self._counter, slot))
+        # Drop stale entries once they dominate, keeping pushes amortized O(log n)
+        if len(heap) > 4 * self.num_voices:
+            heap[:] = [(stamp, s) for s, stamp in enumerate(order.tolist()) if stamp >= 0]
+            heapq.heapify(heap)
+
+    # ─────────────────────────────────────────────────────────
+    # Per-voice control (called on note events)
+    # ─────────────────────────────────────────────────────────
+    def start(self, slot, note, freq):
+        """
+        (Re)trigger the voice in 'slot'. The attack starts from the voice's current
+        amplitude, so retriggering a sounding voice does not click.
+        """
+        self.note[slot] = note
+        self.frequency[slot] = freq
+
+        self.release_order[slot] = -1
+        self._push_order(self._started_heap, self.start_order, slot)
+
+        self.env_state[slot] = ENV_ATTACK
+        self.env_position[slot] = self.shape.attack_position(self.env_amplitude[slot])
+
+    def stop(self, slot):
+        """
+        Move the voice in 'slot' to its release stage.
+        """
+        if self.env_state[slot] != ENV_ATTACK:
+            return
+        self.env_state[slot] = ENV_RELEASE
+        self.env_position[slot] = 0
+        self.release_level[slot] = self.env_amplitude[slot]
+        self._push_order(self._released_heap, self.release_order, slot)
+
+    def set_adsr(self, attack, decay, sustain, release, curve='linear'):
+        """
+        Switch every voice to the (cached) envelope shape for these settings.
+        The tables are built here, on the caller's thread, never in render();
+        the next render() moves the sounding voices onto them (_switch_shape).
+        """
+        shape = get_envelope_shape(
+            float(attack), float(decay), float(sustain), float(release), self.sample_rate, curve
+        )
+        if self.shape is None:
+            self.shape = shape
+        else:
+            self._pending_shape = shape
+
+    def _switch_shape(self, shape):
+        """
+        Use 'shape' from now on, re-mapping every sounding voice's position so
+        its level carries on from where it is instead of jumping:
+          - rising in the attack: the point of the new attack at that level,
+          - decaying or sustaining: the point of the new decay at that level
+            (the sustain level itself if it is already below it),
+          - releasing: the new release ramp, restarted from that level.
+        Runs on the audio thread, at the start of a block.
+        """
+        old = self.shape
+        self.shape = shape
+        if shape is old:
+            return
+        held = np.flatnonzero(self.env_state == ENV_ATTACK)
+        if held.size:
+            level = self.env_amplitude[held]
+            rising = self.env_position[held] < old.attack_length
+            attack = shape.attack_decay[:shape.attack_length]
+            decay = shape.attack_decay[shape.attack_length:]
+            self.env_position[held] = np.where(
+                rising,
+                np.searchsorted(attack, level),
+                # The decay ramp falls, so search it negated (ascending)
+                shape.attack_length + np.minimum(np.searchsorted(-decay, -level), decay.size - 1),
+            )
+        releasing = np.flatnonzero(self.env_state == ENV_RELEASE)
+        if releasing.size:
+            self.release_level[releasing] = self.env_amplitude[releasing]
+            self.env_position[releasing] = 0
+
+    # ─────────────────────────────────────────────────────────
+    # Block rendering
+    # ─────────────────────────────────────────────────────────
+    def _render_envelopes(self, held, releasing, num_samples):
+        """
+        Envelope of the voices over one block, as a 2-D float32 array with the
+        'held' voices' rows first, then the 'releasing' ones.
+
+        Each voice reads num_samples consecutive entries of its ramp (clamped at the
+        end, which holds sustain or silence), so attack/decay/sustain/release
+        boundaries inside the block need no per-segment or per-sample work.
+        """
+        shape = self.shape
+        num_held = held.size
+        num_releasing = releasing.size
+        num_voices = num_held + num_releasing
+        # held and releasing are consecutive views of self._slots
+        slots = self._slots[:num_voices]
+        t = sample_ramp(num_samples + 1, np.int64)[1:]
+        env = self._scratch.get('env', (num_voices, num_samples), np.float32)
+        index = self._scratch.get('env_index', (num_voices, num_samples), np.int64)
+        # Per-voice values expanded to the block, so no ufunc below has to broadcast
+        start = self._scratch.get('env_start', (num_voices, num_samples), np.int64)
+        position = self._voice_int[:num_voices]
+        self.env_position.take(slots, out=position)
+        np.copyto(index, t)
+        np.copyto(start, position[:, None])
+        index += start
+
+        if num_held:
+            np.take(shape.attack_decay, index[:num_held], out=env[:num_held], mode='clip')
+
+        if num_releasing:
+            np.take(shape.release, index[num_held:], out=env[num_held:], mode='clip')
+            scale = self._scratch.get('env_scale', (num_releasing, num_samples), np.float32)
+            release_level = self._voice_float[0, :num_releasing]
+            self.release_level.take(releasing, out=release_level)
+            np.copyto(scale, release_level[:, None], casting='same_kind')
+            env[num_held:] *= scale
+            # Voices whose release ends within this block
+            done = self._masks[2, :num_releasing]
+            np.greater_equal(position[num_held:], shape.release.size - 1 - num_samples, out=done)
+            if np.count_nonzero(done):
+                self.env_state[releasing[done]] = ENV_OFF
+
+        position += num_samples
+        self.env_position.put(slots, position)
+        amplitude = self._voice_float[0, :num_voices]
+        np.copyto(amplitude, env[:, -1])
+        self.env_amplitude.put(slots, amplitude)
+        return env
+
+    def render(self, waveform, num_samples, oscillator_mode='wavetable', out=None):
+        """
+        Render every sounding voice and return (mix, finished_notes):
+          - mix: float32 block with all voices summed at their levels (written
+            into 'out' if given),
+          - finished_notes: notes whose voices ended during this block (slot freed).
+
+        oscillator_mode 'wavetable' reads the shared band-limited tables,
+        'naive' evaluates the waveform formulas directly (aliases at high notes).
+        Work arrays are reused between blocks, so the wavetable path allocates no
+        new array memory once the block size has been seen.
+        """
+        if out is None:
+            out = np.empty(num_samples, dtype=np.float32)
+        shape = self._pending_shape
+        if shape is not None:
+            self._pending_shape = None
+            self._switch_shape(shape)
+        # Slot lists are built in preallocated per-voice arrays (no flatnonzero,
+        # fancy indexing or concatenate), so the block allocates nothing per voice
+        held_mask, releasing_mask, finished_mask = self._masks
+        # Off voices still holding a note ended in the last block (held_mask as temp)
+        np.greater_equal(self.note, 0, out=held_mask)
+        np.equal(self.env_state, ENV_OFF, out=finished_mask)
+        finished_mask &= held_mask
+        np.equal(self.env_state, ENV_ATTACK, out=held_mask)
+        np.equal(self.env_state, ENV_RELEASE, out=releasing_mask)
+        num_held = int(np.count_nonzero(held_mask))
+        num_voices = num_held + int(np.count_nonzero(releasing_mask))
+        num_finished = int(np.count_nonzero(finished_mask))
+        if num_finished:
+            self._slot_ids.compress(finished_mask, out=self._finished[:num_finished])
+
+        if num_voices == 0:
+            out.fill(0.0)
+        else:
+            # Row order of the envelope block: held voices first
+            slots = self._slots[:num_voices]
+            held, releasing = slots[:num_held], slots[num_held:]
+            self._slot_ids.compress(held_mask, out=held)
+            self._slot_ids.compress(releasing_mask, out=releasing)
+            env = self._render_envelopes(held, releasing, num_samples)
+
+            frequency, phase_inc, phase = self._voice_float[1:, :num_voices]
+            self.frequency.take(slots, out=frequency)
+            np.multiply(frequency, TWO_PI / self.sample_rate, out=phase_inc)
+            self.phase.take(slots, out=phase)
+            phases = self._scratch.get('phases', env.shape, np.float64)
+            wavetable = oscillator_mode == 'wavetable'
+            _, next_phase = advance_phase(phase, phase_inc, num_samples,
+                                          out=phases, wrap=not wavetable, scratch=self._scratch)
+            self.phase.put(slots, next_phase)
+
+            wave = self._scratch.get('wave', env.shape, np.float32)
+            if wavetable:
+                render_wavetable(waveform, phases, frequency, self.sample_rate,
+                                 out=wave, scratch=self._scratch)
+            else:
+                # The formulas run in float64 (in place over the phases), then
+                # one cast into the float32 block
+                render_waveform(waveform, phases, out=phases)
+                np.copyto(wave, phases, casting='same_kind')
+            env *= wave
+            level = self._voice_float[1, :num_voices]
+            self.level.take(slots, out=level)
+            np.copyto(self._voice_level[:num_voices], level, casting='same_kind')
+            np.matmul(self._voice_level[:num_voices], env, out=out)
+
+            # Voices whose release ended in this block follow the ones already off
+            state = self._voice_state[:num_voices]
+            self.env_state.take(slots, out=state)
+            died = self._masks[2, :num_voices]
+            np.equal(state, ENV_OFF, out=died)
+            num_died = int(np.count_nonzero(died))
+            if num_died:
+                slots.compress(died, out=self._finished[num_finished:num_finished + num_died])
+                num_finished += num_died
+
+        if not num_finished:
+            return out, []
+        finished = self._finished[:num_finished]
+        finished_notes = self.note[finished].tolist()
+        if finished_notes:
+            self.note[finished] = -1
+            self.phase[finished] = 0.0
+            self.env_amplitude[finished] = 0.0
+            self.start_order[finished] = -1
+            self.release_order[finished] = -1
+            self.free_slots.extend(finished.tolist())
+        return out, finished_notes
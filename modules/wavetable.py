@@ -0,0 +1,149 @@
+# modules/wavetable.py
+
+import functools
+
+import numpy as np
+
+from .buffers import ScratchBuffers
+from .oscillator import TWO_PI
+
+# Samples per single-cycle table
+TABLE_SIZE = 2048
+# Fundamental covered by the lowest mipmap level; each level above covers one more octave
+LOWEST_FREQ = 20.0
+
+
+def _harmonic_amplitudes(waveform, num_harmonics):
+    """
+    Fourier sine-series amplitudes (index k = harmonic number) of the naive waveforms
+    in modules/oscillator.py, truncated to 'num_harmonics'.
+    """
+    k = np.arange(num_harmonics + 1, dtype=np.float64)
+    amps = np.zeros(num_harmonics + 1, dtype=np.float64)
+    if waveform == 'sine':
+        amps[1] = 1.0
+    elif waveform == 'sawtooth':
+        # 2*(phase/2π) - 1 = -(2/π) Σ sin(kθ)/k
+        amps[1:] = -2.0 / (np.pi * k[1:])
+    elif waveform == 'square':
+        # (4/π) Σ_{k odd} sin(kθ)/k
+        odd = k % 2 == 1
+        amps[odd] = 4.0 / (np.pi * k[odd])
+    elif waveform == 'triangle':
+        # (8/π²) Σ_{k odd} (-1)^((k-1)/2) sin(kθ)/k²
+        odd = k % 2 == 1
+        signs = np.where(((k[odd] - 1) // 2) % 2 == 0, 1.0, -1.0)
+        amps[odd] = signs * 8.0 / (np.pi ** 2 * k[odd] ** 2)
+    return amps
+
+
+@functools.lru_cache(maxsize=None)
+def get_mipmap(waveform, sample_rate):
+    """
+    Band-limited single-cycle tables for 'waveform', one per octave.
+
+    Row i is safe (no harmonic above Nyquist) for fundamentals up to
+    LOWEST_FREQ * 2**(i+1). Each row carries one guard sample so interpolation never
+    has to wrap. Built once per (waveform, sample_rate) and shared by every
+    oscillator in the process; returns None for unknown waveforms.
+    """
+    if waveform not in ('sine', 'square', 'triangle', 'sawtooth'):
+        return None
+
+    nyquist = 0.5 * sample_rate
+    num_levels = max(1, int(np.ceil(np.log2(nyquist / LOWEST_FREQ))))
+    tables = np.empty((num_levels, TABLE_SIZE + 1), dtype=np.float32)
+
+    for level in range(num_levels):
+        top_freq = LOWEST_FREQ * 2.0 ** (level + 1)
+        num_harmonics = int(min(TABLE_SIZE // 2 - 1, max(1, nyquist // top_freq)))
+        amps = _harmonic_amplitudes(waveform, num_harmonics)
+
+        # A sin(kθ) component of amplitude a is the bin -1j * a * N/2
+        spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=np.complex128)
+        spectrum[:num_harmonics + 1] = -0.5j * TABLE_SIZE * amps
+        cycle = np.fft.irfft(spectrum, TABLE_SIZE)
+
+        tables[level, :TABLE_SIZE] = cycle
+        tables[level, TABLE_SIZE] = cycle[0]
+
+    tables.setflags(write=False)
+    return tables
+
+
+def mipmap_levels(frequencies, num_levels, scratch=None):
+    """
+    Pick the mipmap row for each fundamental frequency (into 'scratch' arrays
+    when given, so a block allocates nothing per voice).
+    """
+    if scratch is None:
+        ratio = np.maximum(np.asarray(frequencies, dtype=np.float64), LOWEST_FREQ) / LOWEST_FREQ
+        levels = np.ceil(np.log2(ratio)).astype(np.int64) - 1
+        return np.clip(levels, 0, num_levels - 1)
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    ratio = scratch.get('mipmap_ratio', frequencies.shape, np.float64)
+    np.maximum(frequencies, LOWEST_FREQ, out=ratio)
+    ratio /= LOWEST_FREQ
+    np.log2(ratio, out=ratio)
+    np.ceil(ratio, out=ratio)
+    levels = scratch.get('mipmap_levels', frequencies.shape, np.int64)
+    np.copyto(levels, ratio, casting='unsafe')
+    levels -= 1
+    # np.maximum/np.minimum: np.clip's Python-level wrapper costs more than the work
+    np.maximum(levels, 0, out=levels)
+    np.minimum(levels, num_levels - 1, out=levels)
+    return levels
+
+
+def render_wavetable(waveform, phases, frequencies, sample_rate, out=None, scratch=None):
+    """
+    Read a block of phases (radians, any non-negative value; whole cycles wrap)
+    from the band-limited tables with linear interpolation. 'phases' is
+    (voices, samples) and 'frequencies' holds one fundamental per voice, which
+    selects each voice's mipmap row. Work arrays come from 'scratch'
+    (a ScratchBuffers) when given, so repeated calls allocate nothing.
+    """
+    if out is None:
+        out = np.empty(phases.shape, dtype=np.float64)
+    if scratch is None:
+        scratch = ScratchBuffers()
+
+    tables = get_mipmap(waveform, sample_rate)
+    if tables is None:
+        out.fill(0.0)
+        return out
+
+    position = scratch.get('wavetable_position', phases.shape, np.float64)
+    np.multiply(phases, TABLE_SIZE / TWO_PI, out=position)
+    # Positions are non-negative, so the floor is the truncated index
+    whole = scratch.get('wavetable_whole', phases.shape, np.float64)
+    np.floor(position, out=whole)
+    position -= whole
+    index = scratch.get('wavetable_index', phases.shape, np.int64)
+    np.copyto(index, whole, casting='unsafe')
+    np.bitwise_and(index, TABLE_SIZE - 1, out=index)
+
+    # Offset each voice's indices into its mipmap row of the flattened tables
+    # (expanded to the block first; every operand below has the block's shape and dtype)
+    rows = mipmap_levels(frequencies, tables.shape[0], scratch)
+    rows *= TABLE_SIZE + 1
+    row_offset = scratch.get('wavetable_row', phases.shape, np.int64)
+    np.copyto(row_offset, rows[..., None])
+    index += row_offset
+    flat = tables.reshape(-1)
+
+    left = scratch.get('wavetable_left', phases.shape, np.float32)
+    right = scratch.get('wavetable_right', phases.shape, np.float32)
+    np.take(flat, index, out=left, mode='clip')
+    index += 1
+    np.take(flat, index, out=right, mode='clip')
+
+    # left + frac * (right - left)
+    np.subtract(right, left, out=right)
+    frac = position
+    if out.dtype == np.float32:
+        frac = scratch.get('wavetable_frac', phases.shape, np.float32)
+        np.copyto(frac, position, casting='same_kind')
+    np.multiply(right, frac, out=out)
+    out += left
+    return out
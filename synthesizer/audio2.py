@@ -1,136 +1,626 @@
-import pyaudio
+import threading
+import time
+import tracemalloc
+
 import numpy as np
 from synthesizer.limiter import Limiter
+from synthesizer.events import EventScheduler
+from synthesizer.transport import Transport
+from synthesizer.parallel import ParallelRenderer
+from synthesizer.output_format import OutputFormat
+from synthesizer.render_ahead import RenderAhead
+from synthesizer.chain_snapshot import CHAIN_FADE_TIME, ChainEntry
+from synthesizer.note_routing import NoteRoutes
+from synthesizer.profiler import EngineProfiler
+from synthesizer.backends import CALLBACK_CONTINUE, create_backend
+from modules.buffers import BufferPool, ScratchBuffers
+from modules.smoothing import SmoothedParameter
+
+# Bytes a steady-state block may allocate for Python/NumPy bookkeeping
+# (see AudioManager.assert_no_block_allocations)
+BLOCK_ALLOCATION_TOLERANCE = 6 * 1024
 
 class AudioStreamManager:
-    """Handles the PyAudio stream initialization and management."""
-    def __init__(self, sample_rate=44100, buffer_size=1024):
+    """
+    Handles the audio stream through a pluggable backend (see
+    synthesizer.backends): PyAudio's callback stream by default, or a
+    blocking PyAudio writer, a null device or a file sink. PyAudio is only
+    opened when a stream starts, so an AudioManager can render offline on
+    machines without an audio device.
+    """
+    def __init__(self, sample_rate=44100, buffer_size=1024, output_format=None, backend='pyaudio'):
         self.sample_rate = sample_rate
         self.buffer_size = buffer_size
-        self.p = pyaudio.PyAudio()
-        self.stream = None
+        self.output_format = output_format or OutputFormat()
+        self.backend = None
+        self.set_backend(backend)
+
+    @property
+    def active(self):
+        return self.backend.active
+
+    def set_backend(self, backend, **options):
+        """
+        Use 'backend', a name from BACKENDS (options go to its constructor) or
+        an AudioBackend. Call while the stream is stopped.
+        """
+        if isinstance(backend, str):
+            backend = create_backend(backend, self.sample_rate, self.buffer_size, self.output_format,
+                                     **options)
+        self.backend = backend
 
     def start_stream(self, audio_callback):
-        """Start the PyAudio stream."""
-        self.stream = self.p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self.sample_rate,
-            output=True,
-            frames_per_buffer=self.buffer_size,
-            stream_callback=audio_callback
-        )
-        self.stream.start_stream()
-        print("Audio stream started.")
+        """Start the backend's stream in the output format's sample format and channels."""
+        self.backend.start(audio_callback)
+        print(f"Audio stream started ({self.backend.name}).")
 
     def stop_stream(self):
-        """Stop the PyAudio stream."""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.stream = None
+        """Stop the backend's stream."""
+        self.backend.stop()
         print("Audio stream stopped.")
 
 class ModuleChainManager:
-    """Manages the audio module chain and processes audio through the chain."""
-    def __init__(self):
-        self.module_chain = []
+    """
+    Manages the audio module chain and processes audio through the chain.
+    With a ProcessingGraph set (set_graph), the graph's compiled plan is
+    rendered instead of the linear chain.
+
+    The chain is edited with add_module / insert_module / remove_module /
+    move_module from any thread. Each edit builds a new immutable snapshot
+    (a tuple of ChainEntry) and publishes it with a single assignment; the
+    audio thread reads it once per block, so an edit lands on a block boundary
+    and never changes the chain under a running block. Modules that enter or
+    leave the chain fade in or out over 'fade_time' seconds.
+    """
+    # Pool slots: 0, 1 and 3 for the chain to rotate through (a fading module's
+    # mix needs a buffer besides its input and output), 2 for the block output
+    _OUTPUT = 2
+    _CHAIN_SLOTS = (0, 1, 3)
+
+    def __init__(self, transport=None, sample_rate=44100, fade_time=CHAIN_FADE_TIME):
+        self.transport = transport
+        self.fade_length = max(1, int(round(fade_time * sample_rate)))
+        self._entries = ()
+        self._chain = ()
+        self._edit_lock = threading.Lock()
+        # Edits before the first block need no fades
+        self._rendering = False
+        self.pool = BufferPool(count=4)
+        self._fade_gains = ScratchBuffers()
+        self.graph = None
+        self.plan = None
+        # Optional ParallelRenderer for the graph's plan
+        self.renderer = None
+        # Note receivers per event source, rebuilt on every chain/graph change
+        self.note_routes = NoteRoutes()
+        # EngineProfiler timing every module, when profiling is enabled
+        self.profiler = None
+
+    # ─────────────────────────────────────────────────────────
+    # Chain editing (copy-on-write snapshots)
+    # ─────────────────────────────────────────────────────────
+    @property
+    def module_chain(self):
+        """The chain as the user sees it (a tuple; modules fading out are not in it)."""
+        return self._chain
+
+    @module_chain.setter
+    def module_chain(self, modules):
+        # Replace the whole chain at once, without fades
+        with self._edit_lock:
+            self._publish([ChainEntry(module) for module in modules])
 
     def add_module(self, module):
-        """Add a module to the chain."""
-        self.module_chain.append(module)
+        """Add a module to the end of the chain."""
+        self.insert_module(len(self._chain), module)
+
+    def insert_module(self, index, module):
+        """Insert a module before chain position 'index', fading it in."""
+        with self._edit_lock:
+            entries = list(self._entries)
+            entry = self._entering(module)
+            for other in entries:
+                if other.module is module and other.removing and not other.finished:
+                    # Still fading out: come back in once that has finished
+                    entry.after = other
+            entries.insert(self._entry_index(entries, index), entry)
+            self._publish(entries)
+
+    def remove_module(self, module):
+        """Take a module out of the chain, fading it out first."""
+        with self._edit_lock:
+            entries = list(self._entries)
+            for i, entry in enumerate(entries):
+                if entry.module is module and not entry.removing:
+                    if self._fades(module):
+                        entries[i] = entry.faded_out(self.fade_length)
+                    else:
+                        del entries[i]
+                    self._publish(entries)
+                    return
+
+    def move_module(self, module, offset):
+        """
+        Move a module 'offset' places along the chain (negative is towards
+        the start): it fades out where it is and back in at its new place.
+        """
+        with self._edit_lock:
+            chain = self._chain
+            if module not in chain:
+                return
+            old_index = chain.index(module)
+            new_index = min(max(old_index + offset, 0), len(chain) - 1)
+            if new_index == old_index:
+                return
+
+            entries = list(self._entries)
+            position = next(i for i, e in enumerate(entries) if e.module is module and not e.removing)
+            entry = entries[position]
+            if entry.after is not None:
+                # Still waiting for its fade-out elsewhere: it has not played here yet
+                del entries[position]
+                arriving = self._entering(module)
+                arriving.after = entry.after
+            elif self._fades(module):
+                leaving = entry.faded_out(self.fade_length)
+                entries[position] = leaving
+                arriving = self._entering(module)
+                arriving.after = leaving
+            else:
+                del entries[position]
+                arriving = entry
+            # Index among the other visible modules, where it goes
+            others = [e for e in entries if not e.removing]
+            entries.insert(self._entry_index(entries, new_index, others), arriving)
+            self._publish(entries)
+
+    def _fades(self, module):
+        # Note clocks (the arpeggiator) only pass audio through: no fade
+        return self._rendering and not hasattr(module, 'samples_until_step')
+
+    def _entering(self, module):
+        if self._fades(module):
+            return ChainEntry(module, 'in', self.fade_length, -self.fade_length)
+        return ChainEntry(module)
+
+    def _entry_index(self, entries, index, visible=None):
+        # Position in 'entries' of the index-th visible module (or the end)
+        if visible is None:
+            visible = [e for e in entries if not e.removing]
+        if index >= len(visible):
+            return len(entries)
+        target = visible[index]
+        return next(i for i, e in enumerate(entries) if e is target)
+
+    def _publish(self, entries):
+        entries = tuple(e for e in entries if not e.finished)
+        self._entries = entries
+        self._chain = tuple(e.module for e in entries if not e.removing)
+        self.update_routes()
+
+    def update_routes(self):
+        """
+        Rebuild the note-routing table from the modules being rendered. Chain
+        and graph edits call this; call it after changing a module's midi_channel.
+        """
+        self.note_routes = NoteRoutes(self.modules())
+
+    def set_graph(self, graph):
+        """
+        Render 'graph' instead of the linear chain (None goes back to the chain).
+        The graph is compiled here and again after every edit, on the editing
+        thread; the audio thread only ever swaps to the finished plan.
+        """
+        if self.graph is not None:
+            self.graph.on_change = None
+        self.graph = graph
+        if graph is None:
+            self.plan = None
+            self.update_routes()
+            return
+        graph.on_change = self._compile_graph
+        self._compile_graph(graph)
+
+    def _compile_graph(self, graph):
+        plan = graph.compile()
+        plan.profiler = self.profiler
+        self.plan = plan
+        self.update_routes()
+
+    def set_profiler(self, profiler):
+        self.profiler = profiler
+        if self.plan is not None:
+            self.plan.profiler = profiler
+
+    def modules(self):
+        """
+        The modules currently rendered: the graph's in plan order, or the chain.
+        """
+        plan = self.plan
+        return plan.modules if plan is not None else self.module_chain
+
+    def process_audio(self, frame_count, current_audio=None, entries=None):
+        """
+        Process the audio through the module chain ('entries', a snapshot; the
+        current one by default).
+        Modules with accepts_out write into pool buffers (alternating, so a
+        module's output never overwrites its input); the result may be a pool
+        buffer, valid until the next call.
+        """
+        plan = self.plan
+        if plan is not None:
+            renderer = self.renderer
+            if renderer is not None:
+                return renderer.run(plan, frame_count)
+            return plan.run(frame_count)
+
+        if entries is None:
+            entries = self._entries
+        profiler = self.profiler
+        # A moved module fades in once its fade-out ended in an earlier call
+        for entry in entries:
+            if entry.after is not None and entry.after.finished:
+                entry.after = None
+
+        self.pool.reserve(frame_count)
+        for entry in entries:
+            module = entry.module
+            if entry.fade is None:
+                current_audio = self._render_module(module, frame_count, current_audio, profiler)
+                continue
+            if entry.after is not None or entry.finished:
+                continue
+            dry = current_audio
+            wet = self._render_module(module, frame_count, dry, profiler)
+            gains = entry.gains(self._fade_gains.get('gains', frame_count, np.float32))
+            if gains is None:
+                # Fade-in complete
+                current_audio = wet
+                continue
+            if dry is None and entry.position <= 0:
+                # Priming at the head of the chain: still silence, keep it None
+                continue
+            mixed = self._free_slot(frame_count, dry, wet)
+            if dry is None:
+                np.multiply(wet, gains, out=mixed)
+            else:
+                # dry + (wet - dry) * level
+                np.subtract(wet, dry, out=mixed)
+                mixed *= gains
+                mixed += dry
+            current_audio = mixed
 
-    def process_audio(self, frame_count, current_audio=None):
-        """Process the audio through the module chain."""
-        for module in self.module_chain:
-            current_audio = module.generate(frame_count, current_audio)
         if current_audio is None:
-            current_audio = np.zeros(frame_count, dtype=np.float32)
+            current_audio = self.pool.get(0, frame_count)
+            current_audio.fill(0.0)
         return current_audio
 
+    def _render_module(self, module, frame_count, current_audio, profiler=None):
+        if profiler is not None:
+            start = time.perf_counter()
+        if getattr(module, 'accepts_out', False):
+            out = self._free_slot(frame_count, current_audio)
+            result = module.generate(frame_count, current_audio, out=out)
+        else:
+            result = module.generate(frame_count, current_audio)
+        if profiler is not None:
+            profiler.add_module_time(module, time.perf_counter() - start)
+        return result
+
+    def _free_slot(self, frame_count, *in_use):
+        # A chain buffer that none of 'in_use' lives in
+        for slot in self._CHAIN_SLOTS:
+            buffer = self.pool.get(slot, frame_count)
+            if not any(a is not None and np.may_share_memory(a, buffer) for a in in_use):
+                return buffer
+        raise RuntimeError("No free chain buffer")
+
+    def process_block(self, frame_count, events=(), dispatch=None):
+        """
+        Process one audio block, splitting it at the sample offsets of 'events'
+        (sorted (offset, midi_note, is_press, source) tuples) so each note lands
+        on its exact sample. 'dispatch' is called for every event at its offset.
+
+        Modules with their own note clock (samples_until_step / fire_due_steps,
+        e.g. the arpeggiator) split the block the same way, so their steps fire
+        at exact offsets too, several per block if the rate is high enough.
+
+        With a transport, the musical clock advances once per block here and
+        every module with sync_transport(...) reads it before anything runs.
+        """
+        # One snapshot for the whole block: edits land on the next block
+        entries = self._entries
+        self._rendering = True
+        modules = self.modules()
+        if self.transport is not None:
+            self.transport.start_block(frame_count)
+            for module in modules:
+                if hasattr(module, 'sync_transport'):
+                    module.sync_transport(self.transport)
+
+        self.pool.reserve(frame_count)
+        output = self.pool.get(self._OUTPUT, frame_count)
+        clocks = [module for module in modules if hasattr(module, 'samples_until_step')]
+        if not events and not clocks:
+            np.copyto(output, self.process_audio(frame_count, entries=entries))
+            return output
+
+        pos = 0
+        next_event = 0
+        while pos < frame_count:
+            # Everything due at 'pos': input events first, then clock steps
+            while next_event < len(events) and events[next_event][0] <= pos:
+                _, midi_note, is_press, source = events[next_event]
+                dispatch(midi_note, is_press, source)
+                next_event += 1
+            for clock in clocks:
+                clock.fire_due_steps()
+
+            end = frame_count
+            if next_event < len(events):
+                end = min(end, events[next_event][0])
+            for clock in clocks:
+                end = min(end, pos + max(1, clock.samples_until_step()))
+            output[pos:end] = self.process_audio(end - pos, entries=entries)
+            pos = end
+        return output
+
 class GlobalControls:
     """Handles the global parameters such as volume, gain, waveform, etc."""
-    def __init__(self):
+    def __init__(self, sample_rate=44100):
         self.global_volume = 1.0
         self.global_gain = 1.0
+        # The sliders only set targets; the callback ramps towards them
+        self.volume_param = SmoothedParameter(1.0, sample_rate)
+        self.gain_param = SmoothedParameter(1.0, sample_rate)
 
     def set_global_volume(self, vol):
         self.global_volume = vol
+        self.volume_param.set_target(vol)
 
     def set_global_gain(self, gain):
         self.global_gain = gain
+        self.gain_param.set_target(gain)
 
     def apply_global_params(self, audio):
-        """Apply global volume and gain adjustments."""
-        audio *= self.global_volume
-        return audio * self.global_gain
+        """Apply global volume and gain adjustments in place (ramped while they change)."""
+        num_samples = audio.shape[0]
+        audio *= self.volume_param.ramp(num_samples)
+        audio *= self.gain_param.ramp(num_samples)
+        return audio
 
 class KeyboardHandler:
     """Handles note on/off via keyboard input."""
-    def __init__(self, module_chain):
+    def __init__(self, module_chain_manager, scheduler):
         self.arpeggiator = None
-        self.module_chain = module_chain
+        self.module_chain_manager = module_chain_manager
+        self.scheduler = scheduler
+
+    @property
+    def module_chain(self):
+        # Whatever is being rendered: the linear chain or the graph's modules
+        return self.module_chain_manager.modules()
 
     def set_arpeggiator(self, arpeggiator):
         self.arpeggiator = arpeggiator
 
     def handle_note(self, midi_note, is_press, source="user"):
-        """Handles keyboard events and sends notes to the appropriate modules."""
-        if source == "user":
-            arpeggiator = None
-            for module in self.module_chain:
-                if module.__class__.__name__ == "ArpeggiatorModule":
-                    arpeggiator = module
-                    break
-
-            if arpeggiator:
-                if is_press:
-                    arpeggiator.note_on(midi_note)
-                else:
-                    arpeggiator.note_off(midi_note)
-            else:
-                for module in self.module_chain:
-                    if hasattr(module, 'note_on') and hasattr(module, 'note_off'):
-                        if is_press:
-                            module.note_on(midi_note)
-                        else:
-                            module.note_off(midi_note)
-
-        elif source == "arpeggiator":
-            for module in self.module_chain:
-                if module.__class__.__name__ != "ArpeggiatorModule":
-                    if hasattr(module, 'note_on') and hasattr(module, 'note_off'):
-                        if is_press:
-                            module.note_on(midi_note)
-                        else:
-                            module.note_off(midi_note)
+        """
+        Entry point for input threads: timestamp the event and queue it.
+        The audio callback applies it at the matching sample of the next block.
+        """
+        self.scheduler.push(midi_note, is_press, source)
+
+    def dispatch_note(self, midi_note, is_press, source="user"):
+        """
+        Sends a note event to the modules its source is routed to (runs on the
+        audio thread; see NoteRoutes).
+        """
+        routes = self.module_chain_manager.note_routes.table.get(source)
+        if routes is not None:
+            for handler in routes[is_press]:
+                handler(midi_note)
 
 
 class AudioManager:
-    def __init__(self, sample_rate=44100, buffer_size=2048):
+    def __init__(self, sample_rate=44100, buffer_size=2048, sample_format='int16', channels=1,
+                 backend='pyaudio'):
         self.sample_rate = sample_rate
         self.buffer_size = buffer_size
-        self.audio_stream_manager = AudioStreamManager(sample_rate, buffer_size)
-        self.module_chain_manager = ModuleChainManager()
-        self.global_controls = GlobalControls()
-        self.keyboard_handler = KeyboardHandler(self.module_chain_manager.module_chain)
+        # Device sample format and channel count (see OutputFormat)
+        self.output_format = OutputFormat(sample_format, channels)
+        self.audio_stream_manager = AudioStreamManager(sample_rate, buffer_size, self.output_format, backend)
+        self.transport = Transport(sample_rate)
+        self.module_chain_manager = ModuleChainManager(self.transport, sample_rate)
+        self.global_controls = GlobalControls(sample_rate)
+        self.event_scheduler = EventScheduler(sample_rate)
+        self.keyboard_handler = KeyboardHandler(self.module_chain_manager, self.event_scheduler)
         self.limiter = Limiter(sample_rate=self.sample_rate, threshold=0.95)
+        # Optional RenderAhead worker; the callback renders itself while None
+        self.render_ahead = None
+        # Optional EngineProfiler (enable_profiling)
+        self.profiler = None
 
-    def audio_callback(self, in_data, frame_count, time_info, status):
-        """The callback for audio streaming."""
-        current_audio = self.module_chain_manager.process_audio(frame_count)
+    @property
+    def output_latency(self):
+        """
+        Samples between an event and its sound in render_block's output (the
+        limiter's lookahead delay). Divide by sample_rate for seconds.
+        """
+        return self.limiter.latency
+
+    def render_block(self, frame_count, events=None):
+        """
+        Render one block in the output format: interleaved (frames, channels)
+        float32 or int16, or packed int24 bytes. Everything happens in
+        preallocated buffers; the returned array is reused by the next call.
+        'events' ((offset, midi_note, is_press, source), sorted) replaces the
+        live input queue, e.g. for offline rendering.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        if events is None:
+            events = self.event_scheduler.collect_block(frame_count)
+        current_audio = self.module_chain_manager.process_block(
+            frame_count, events, self.keyboard_handler.dispatch_note
+        )
         current_audio = self.global_controls.apply_global_params(current_audio)
         processed = self.limiter.process_block(current_audio)
         np.clip(processed, -1.0, 1.0, out=processed)
+        output = self.output_format.encode(processed)
+        if profiler is not None:
+            profiler.end_block(time.perf_counter() - start, frame_count)
+        return output
+
+    def audio_callback(self, in_data, frame_count, time_info, status):
+        """
+        The callback for audio streaming. The output buffer itself goes to
+        PortAudio (an ndarray exports its memory; PyAudio's argument parsing
+        refuses memoryview and bytearray objects), so nothing is copied to bytes.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+            profiler.begin_callback(start, status)
+        if self.render_ahead is not None:
+            output = self.render_ahead.read(frame_count)
+        else:
+            output = self.render_block(frame_count)
+        if profiler is not None:
+            profiler.end_callback(time.perf_counter() - start, frame_count)
+        return (output, CALLBACK_CONTINUE)
+
+    def measure_block_allocations(self, frame_count=None, blocks=32, warmup=8):
+        """
+        Render 'warmup' blocks, then 'blocks' more under tracemalloc, and return
+        the most heap memory (bytes) any single steady-state block allocated at
+        once. For tests and benchmarks; do not call while the stream is running.
+        """
+        frame_count = frame_count or self.buffer_size
+        for _ in range(warmup):
+            self.render_block(frame_count)
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        worst = 0
+        try:
+            for _ in range(blocks):
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                self.render_block(frame_count)
+                _, peak = tracemalloc.get_traced_memory()
+                worst = max(worst, peak - before)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        return worst
+
+    def assert_no_block_allocations(self, frame_count=None, blocks=32, warmup=8,
+                                    tolerance=BLOCK_ALLOCATION_TOLERANCE):
+        """
+        Fail (AssertionError) if a steady-state block allocates array memory.
+
+        The interpreter and NumPy still create small objects while a block runs
+        (array views, scalars), a few KB that grow neither with the block nor
+        with the voice count (per-voice work arrays are preallocated in the
+        VoiceBank); 'tolerance' covers those. Any block-sized array at the
+        default buffer size exceeds it. Parameters that are still gliding render
+        fresh ramps, so hold the controls still while measuring.
+        """
+        frame_count = frame_count or self.buffer_size
+        worst = self.measure_block_allocations(frame_count, blocks, warmup)
+        assert worst <= tolerance, (
+            f"steady-state block allocated {worst} bytes (tolerance {tolerance})"
+        )
+        return worst
+
+    def enable_parallel_rendering(self, workers=None, mode='auto'):
+        """
+        Render independent branches of the processing graph on worker threads
+        (see ParallelRenderer; 'auto' falls back to serial when it does not pay
+        off). The linear chain has no independent branches and stays serial.
+        """
+        renderer = self.module_chain_manager.renderer
+        if renderer is None:
+            self.module_chain_manager.renderer = ParallelRenderer(self.sample_rate, workers, mode)
+        else:
+            renderer.set_mode(mode)
+        return self.module_chain_manager.renderer
+
+    def disable_parallel_rendering(self):
+        renderer = self.module_chain_manager.renderer
+        self.module_chain_manager.renderer = None
+        if renderer is not None:
+            renderer.close()
+
+    def enable_profiling(self, capacity=1024, print_interval=None, deadline=1.0):
+        """
+        Start recording callback, block and per-module timings (see
+        EngineProfiler); print a report every print_interval seconds if given.
+        Returns the profiler; profiler.stats() has the numbers.
+        """
+        self.disable_profiling()
+        profiler = EngineProfiler(self.sample_rate, capacity, deadline, print_interval)
+        self.module_chain_manager.set_profiler(profiler)
+        self.profiler = profiler
+        profiler.start_printing()
+        return profiler
+
+    def disable_profiling(self):
+        profiler = self.profiler
+        self.profiler = None
+        self.module_chain_manager.set_profiler(None)
+        if profiler is not None:
+            profiler.stop_printing()
+
+    def set_backend(self, backend, **options):
+        """
+        Send the audio to another backend ('pyaudio', 'pyaudio-blocking',
+        'null', 'file' or an AudioBackend; see synthesizer.backends). A running
+        stream moves to the new backend.
+        """
+        streaming = self.audio_stream_manager.active
+        if streaming:
+            self.stop_stream()
+        self.audio_stream_manager.set_backend(backend, **options)
+        if streaming:
+            self.start_stream()
+        return self.audio_stream_manager.backend
+
+    def enable_render_ahead(self, blocks_ahead=4):
+        """
+        Render on a dedicated thread, blocks_ahead blocks ahead of the device
+        (see RenderAhead), and let the callback only copy frames out. A running
+        stream is restarted so that only one thread ever renders.
+        """
+        streaming = self.audio_stream_manager.active
+        if streaming:
+            self.stop_stream()
+        self.render_ahead = RenderAhead(self, blocks_ahead)
+        if streaming:
+            self.start_stream()
+        return self.render_ahead
 
-        # Convert to int16 for PyAudio
-        out_int16 = (processed * 32767).astype(np.int16)
-        return (out_int16.tobytes(), pyaudio.paContinue)
+    def disable_render_ahead(self):
+        streaming = self.audio_stream_manager.active
+        if streaming:
+            self.stop_stream()
+        self.render_ahead = None
+        if streaming:
+            self.start_stream()
 
     def start_stream(self):
         """Start the audio stream and begin playback."""
+        if self.render_ahead is not None:
+            self.render_ahead.start()
         self.audio_stream_manager.start_stream(self.audio_callback)
 
     def stop_stream(self):
         """Stop the audio stream gracefully."""
         self.audio_stream_manager.stop_stream()
+        if self.render_ahead is not None:
+            self.render_ahead.stop()
+        if self.module_chain_manager.renderer is not None:
+            self.module_chain_manager.renderer.close()
@@ -0,0 +1,357 @@
+# synthesizer/backends.py
+
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+
+from synthesizer.output_format import OutputFormat
+from synthesizer.profiler import OUTPUT_UNDERFLOW
+
+try:
+    import pyaudio
+except ImportError:
+    # The null and file backends (and offline rendering) work without PyAudio
+    pyaudio = None
+
+# Callback return flags, as PortAudio defines them (paContinue, paComplete, paAbort)
+CALLBACK_CONTINUE = 0
+CALLBACK_COMPLETE = 1
+CALLBACK_ABORT = 2
+
+# PortAudio's paOutputUnderflowed error code, raised by a blocking write
+_OUTPUT_UNDERFLOWED = -9980
+
+
+class AudioBackend(ABC):
+    """
+    Where the audio callback's blocks go.
+
+    Every backend drives a PortAudio-style callback,
+    audio_callback(in_data, frame_count, time_info, status) -> (data, flag),
+    with frame_count = buffer_size, and plays or stores the returned frames
+    (in output_format's layout). A flag other than CALLBACK_CONTINUE ends the
+    stream. Backends:
+      - 'pyaudio': PortAudio calls the callback from its own thread,
+      - 'pyaudio-blocking': a thread of ours calls it and blocks on
+        stream.write; PortAudio underflows show up in the next status,
+      - 'null': frames are discarded, paced by a simulated real-time clock,
+      - 'file': frames go to a WAV (.wav) or raw PCM file.
+
+    Subclasses implement active, start and stop; one that misses any of them
+    fails when it is constructed, not once a stream is running.
+    """
+    name = None
+
+    def __init__(self, sample_rate=44100, buffer_size=1024, output_format=None):
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.output_format = output_format or OutputFormat()
+
+    @property
+    @abstractmethod
+    def active(self):
+        """Whether a stream is running."""
+
+    @abstractmethod
+    def start(self, audio_callback):
+        """Start calling audio_callback and playing or storing its blocks."""
+
+    @abstractmethod
+    def stop(self):
+        """Stop the stream; a no-op if none is running."""
+
+
+class PyAudioCallbackBackend(AudioBackend):
+    """
+    PortAudio's callback stream. PyAudio is only opened when the stream
+    starts, so building one needs no audio device.
+    """
+    name = 'pyaudio'
+
+    def __init__(self, sample_rate=44100, buffer_size=1024, output_format=None):
+        super().__init__(sample_rate, buffer_size, output_format)
+        self.p = None
+        self.stream = None
+
+    @property
+    def active(self):
+        return self.stream is not None
+
+    def open_stream(self, audio_callback=None):
+        if pyaudio is None:
+            raise RuntimeError("PyAudio is not installed; use the 'null' or 'file' backend.")
+        if self.p is None:
+            self.p = pyaudio.PyAudio()
+        return self.p.open(
+            format=self.output_format.pyaudio_format(pyaudio),
+            channels=self.output_format.channels,
+            rate=self.sample_rate,
+            output=True,
+            frames_per_buffer=self.buffer_size,
+            stream_callback=audio_callback
+        )
+
+    def start(self, audio_callback):
+        self.stream = self.open_stream(audio_callback)
+        self.stream.start_stream()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+
+class ThreadedBackend(AudioBackend):
+    """
+    A backend that calls the audio callback from a thread of its own.
+
+    'speed' paces it against the wall clock (1.0 is real time, 2.0 twice as
+    fast, None as fast as possible); 'duration' (seconds of audio) ends the
+    stream on its own. A paced stream that falls more than one block behind
+    its clock reports OUTPUT_UNDERFLOW in the next callback's status and
+    skips the gap, as a device that ran dry would.
+
+    time_info holds the simulated clock: 'output_buffer_dac_time' is the
+    stream time of the block's first frame, 'current_time' the wall time
+    since start (with speed None, the same as the stream time).
+
+    The output is closed when the stream ends, whether stop() ended it, it
+    ran its duration or the callback raised (kept in 'error'); active is
+    False from then on.
+
+    run(audio_callback, blocks) drives the same loop on the calling thread,
+    unpaced, for deterministic tests and captures.
+    """
+    def __init__(self, sample_rate=44100, buffer_size=1024, output_format=None, speed=1.0, duration=None):
+        super().__init__(sample_rate, buffer_size, output_format)
+        self.speed = speed
+        self.duration = duration
+        self._thread = None
+        self._stop = threading.Event()
+        self.error = None
+        self.reset_stats()
+
+    @property
+    def active(self):
+        # The thread ends on its own when the stream completes or the callback raises
+        return self._thread is not None and self._thread.is_alive()
+
+    def reset_stats(self):
+        self.blocks = 0
+        self.frames = 0
+        self.underflows = 0
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'blocks': self.blocks,
+            'frames': self.frames,
+            'seconds': self.frames / self.sample_rate,
+            'underflows': self.underflows,
+        }
+
+    def start(self, audio_callback):
+        if self.active:
+            return
+        # Reap a stream that ended on its own; it has closed its output already
+        self.stop()
+        self.error = None
+        self._open()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(audio_callback, self.speed),
+                                        name=f"synth-{self.name}-backend", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._close()
+
+    def run(self, audio_callback, blocks):
+        """Call audio_callback 'blocks' times on this thread, as fast as possible."""
+        self._open()
+        try:
+            self._loop(audio_callback, None, blocks)
+        finally:
+            self._close()
+
+    # ─────────────────────────────────────────────────────────
+    # The stream loop
+    # ─────────────────────────────────────────────────────────
+    def _run(self, audio_callback, speed):
+        try:
+            self._loop(audio_callback, speed)
+        except Exception as e:
+            self.error = e
+            print(f"{self.name} backend stopped: {e}")
+        finally:
+            self._close()
+
+    def _loop(self, audio_callback, speed, blocks=None):
+        frame_count = self.buffer_size
+        block_seconds = frame_count / self.sample_rate
+        max_frames = int(self.duration * self.sample_rate) if self.duration is not None else None
+        time_info = {'input_buffer_adc_time': 0.0, 'current_time': 0.0, 'output_buffer_dac_time': 0.0}
+        status = 0
+        frames = 0
+        stream_time = 0.0
+        start = time.perf_counter()
+
+        while not self._stop.is_set():
+            if blocks is not None and blocks <= 0:
+                break
+            if max_frames is not None and frames >= max_frames:
+                break
+            time_info['output_buffer_dac_time'] = stream_time
+            time_info['current_time'] = time.perf_counter() - start if speed else stream_time
+            if status & OUTPUT_UNDERFLOW:
+                self.underflows += 1
+            data, flag = audio_callback(None, frame_count, time_info, status)
+            status = self._write(data, frame_count)
+            self.blocks += 1
+            self.frames += frame_count
+            frames += frame_count
+            stream_time += block_seconds
+            if blocks is not None:
+                blocks -= 1
+            if flag != CALLBACK_CONTINUE:
+                break
+
+            if speed:
+                # Sleep until the clock reaches the end of the block just written
+                behind = time.perf_counter() - start - stream_time / speed
+                if behind < 0.0:
+                    self._stop.wait(-behind)
+                elif behind > block_seconds / speed:
+                    # The device would have played silence meanwhile: skip the gap
+                    status |= OUTPUT_UNDERFLOW
+                    start += behind
+
+    def _open(self):
+        pass
+
+    @abstractmethod
+    def _write(self, data, frame_count):
+        """Play or store one block; returns status flags for the next callback."""
+
+    def _close(self):
+        # Called again by stop() after the thread closed the output: must be idempotent
+        pass
+
+
+class PyAudioBlockingBackend(ThreadedBackend):
+    """
+    A PortAudio blocking stream written from our own thread: stream.write
+    paces the loop, and the callback runs outside PortAudio's thread.
+    """
+    name = 'pyaudio-blocking'
+
+    def __init__(self, sample_rate=44100, buffer_size=1024, output_format=None, duration=None):
+        # The device's clock paces the writes; no simulated clock on top
+        super().__init__(sample_rate, buffer_size, output_format, speed=None, duration=duration)
+        self._device = PyAudioCallbackBackend(sample_rate, buffer_size, self.output_format)
+        self.stream = None
+
+    def _open(self):
+        self.stream = self._device.open_stream()
+        self.stream.start_stream()
+
+    def _write(self, data, frame_count):
+        try:
+            self.stream.write(data, frame_count, exception_on_underflow=True)
+        except IOError as e:
+            if e.errno != getattr(pyaudio, 'paOutputUnderflowed', _OUTPUT_UNDERFLOWED):
+                raise
+            # PortAudio still played the block; report the gap before it
+            return OUTPUT_UNDERFLOW
+        return 0
+
+    def _close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+
+class NullBackend(ThreadedBackend):
+    """
+    Discards every block, for machines without a sound device. The last block
+    stays available as last_block (a reference to the callback's buffer).
+    """
+    name = 'null'
+
+    def __init__(self, sample_rate=44100, buffer_size=1024, output_format=None, speed=1.0, duration=None):
+        super().__init__(sample_rate, buffer_size, output_format, speed, duration)
+        self.last_block = None
+
+    def _write(self, data, frame_count):
+        self.last_block = data
+        return 0
+
+
+class FileBackend(ThreadedBackend):
+    """
+    Writes every block to 'path': a WAV file if it ends in .wav (int16 or
+    int24, like offline.write_wav), raw interleaved PCM in the output format
+    otherwise, (re)created when the stream starts. Paced in real time by
+    default so live input lands where it was played; speed=None captures as
+    fast as possible.
+    """
+    name = 'file'
+
+    def __init__(self, path='output.wav', sample_rate=44100, buffer_size=1024, output_format=None,
+                 speed=1.0, duration=None):
+        super().__init__(sample_rate, buffer_size, output_format, speed, duration)
+        self.path = path
+        self._file = None
+
+    @property
+    def is_wav(self):
+        return self.path.lower().endswith('.wav')
+
+    def _open(self):
+        if self.is_wav:
+            if self.output_format.sample_format == 'float32':
+                raise ValueError("WAV output needs an int16 or int24 sample format")
+            self._file = wave.open(self.path, 'wb')
+            self._file.setnchannels(self.output_format.channels)
+            self._file.setsampwidth(self.output_format.sample_width)
+            self._file.setframerate(self.sample_rate)
+        else:
+            self._file = open(self.path, 'wb')
+
+    def _write(self, data, frame_count):
+        if self.is_wav:
+            self._file.writeframesraw(data)
+        else:
+            self._file.write(data)
+        return 0
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PyAudioCallbackBackend, PyAudioBlockingBackend, NullBackend, FileBackend)
+}
+
+
+def create_backend(name, sample_rate=44100, buffer_size=1024, output_format=None, **options):
+    """
+    A backend by name ('pyaudio', 'pyaudio-blocking', 'null', 'file'), with
+    its own options (e.g. path= for 'file', speed= for 'null').
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown audio backend {name!r}; choose from {', '.join(BACKENDS)}")
+    if name == 'file':
+        return FileBackend(options.pop('path', 'output.wav'), sample_rate, buffer_size, output_format,
+                           **options)
+    return BACKENDS[name](sample_rate, buffer_size, output_format, **options)
@@ -0,0 +1,298 @@
+# synthesizer/benchmark.py
+
+import argparse
+import itertools
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from modules.arpeggiator_module import ArpeggiatorModule
+from modules.bandpass_filter_module import BandPassFilterModule
+from modules.highpass_filter_module import HighPassFilterModule
+from modules.lfo import LFO_WAVES
+from modules.lowpass_filter_module import LowPassFilterModule
+from modules.mixer_module import MixerModule
+from modules.oscillator import WAVEFORMS
+from modules.polysynth_module import PolySynthModule
+from modules.tremolo_module import TremoloModule
+from modules.vibrato_module import VibratoModule
+
+BUFFER_SIZES = (64, 128, 256, 512, 1024, 2048, 4096)
+VOICE_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+# The parameters a result is identified by when comparing runs
+RESULT_KEYS = ('case', 'buffer_size', 'voices', 'waveform', 'lfo_shape')
+
+# Allocation growth (bytes per block) below this is tracemalloc noise, not a regression
+ALLOCATION_SLACK = 1024
+
+_LOWEST_NOTE = 36
+
+
+def _hold_notes(synth, voices):
+    # Chromatic cluster from C2, one note per voice, held at sustain
+    for note in range(_LOWEST_NOTE, _LOWEST_NOTE + voices):
+        synth.note_on(note)
+
+
+def _module_renderer(module, frame_count, input_audio=None):
+    # One block of 'module' on its own, into a reused buffer where it takes one
+    if getattr(module, 'accepts_out', False):
+        out = np.zeros(frame_count, dtype=np.float32)
+        return lambda: module.generate(frame_count, input_audio, out=out)
+    return lambda: module.generate(frame_count, input_audio)
+
+
+def _test_signal(frame_count):
+    # Fixed, deterministic input for effects: white noise at -12 dBFS
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(frame_count) * 0.25).astype(np.float32)
+
+
+# ─────────────────────────────────────────────────────────
+# Cases: (sample_rate, frame_count, params) -> render callable
+# ─────────────────────────────────────────────────────────
+def _polysynth(sample_rate, frame_count, params):
+    synth = PolySynthModule(sample_rate, params['voices'], params['waveform'])
+    _hold_notes(synth, params['voices'])
+    return _module_renderer(synth, frame_count)
+
+
+def _filter_case(filter_class):
+    def build(sample_rate, frame_count, params):
+        module = filter_class(sample_rate=sample_rate)
+        return _module_renderer(module, frame_count, _test_signal(frame_count))
+    return build
+
+
+def _tremolo(sample_rate, frame_count, params):
+    module = TremoloModule(sample_rate, wave=params['lfo_shape'])
+    return _module_renderer(module, frame_count, _test_signal(frame_count))
+
+
+def _vibrato(sample_rate, frame_count, params):
+    module = VibratoModule(sample_rate, wave=params['lfo_shape'])
+    return _module_renderer(module, frame_count, _test_signal(frame_count))
+
+
+def _mixer(sample_rate, frame_count, params):
+    signal = _test_signal(frame_count)
+    module = MixerModule(2, sample_rate, levels=(0.5, 0.8))
+    return _module_renderer(module, frame_count, (signal, signal[::-1].copy()))
+
+
+def _arpeggiator(sample_rate, frame_count, params):
+    module = ArpeggiatorModule(lambda midi_note, is_press, source="user": None, sample_rate, rate=12.0)
+    for note in (60, 64, 67, 72):
+        module.note_on(note)
+    return _module_renderer(module, frame_count)
+
+
+def _chain(sample_rate, frame_count, params):
+    # The full engine path: chain, limiter and int16 encoding, as the callback runs it
+    from synthesizer.audio2 import AudioManager
+
+    audio_manager = AudioManager(sample_rate=sample_rate, buffer_size=frame_count)
+    synth = PolySynthModule(sample_rate, params['voices'], params['waveform'])
+    audio_manager.module_chain_manager.module_chain = [
+        synth,
+        LowPassFilterModule(1200.0, sample_rate),
+        TremoloModule(sample_rate),
+        VibratoModule(sample_rate),
+    ]
+    _hold_notes(synth, params['voices'])
+    return lambda: audio_manager.render_block(frame_count)
+
+
+# name -> (builder, swept parameters besides the buffer size)
+CASES = {
+    'polysynth': (_polysynth, ('voices', 'waveform')),
+    'lowpass': (_filter_case(LowPassFilterModule), ()),
+    'highpass': (_filter_case(HighPassFilterModule), ()),
+    'bandpass': (_filter_case(BandPassFilterModule), ()),
+    'tremolo': (_tremolo, ('lfo_shape',)),
+    'vibrato': (_vibrato, ('lfo_shape',)),
+    'mixer': (_mixer, ()),
+    'arpeggiator': (_arpeggiator, ()),
+    # LFO shapes are covered by tremolo/vibrato; sweeping them here too would
+    # multiply the longest case by four
+    'chain': (_chain, ('voices', 'waveform')),
+}
+
+
+# ─────────────────────────────────────────────────────────
+# Measuring
+# ─────────────────────────────────────────────────────────
+def measure(render, frame_count, sample_rate, seconds=0.5, repeats=3, warmup=8, alloc_blocks=16):
+    """
+    Time 'render' (one block of frame_count samples per call) over at least
+    'seconds' of audio, 'repeats' times, and trace its allocations.
+
+    Returns ns_per_sample and rtf (wall time / audio time) of the fastest
+    repeat, which is the least disturbed by the rest of the machine, and
+    alloc_bytes_per_block, the most heap memory one steady-state block
+    allocated at once (as AudioManager.measure_block_allocations counts it).
+    """
+    blocks = max(8, int(math.ceil(seconds * sample_rate / frame_count)))
+    for _ in range(warmup):
+        render()
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(blocks):
+            render()
+        best = min(best, time.perf_counter() - start)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    worst = 0
+    try:
+        for _ in range(alloc_blocks):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            render()
+            _, peak = tracemalloc.get_traced_memory()
+            worst = max(worst, peak - before)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    samples = blocks * frame_count
+    return {
+        'ns_per_sample': best / samples * 1e9,
+        'rtf': best / (samples / sample_rate),
+        'alloc_bytes_per_block': worst,
+    }
+
+
+def run_benchmarks(cases=None, buffer_sizes=BUFFER_SIZES, voices=VOICE_COUNTS, waveforms=WAVEFORMS,
+                   lfo_shapes=LFO_WAVES, sample_rate=44100, seconds=0.5, repeats=3, progress=None):
+    """
+    Run every case (all of CASES by default) over the buffer sizes and the
+    parameters it depends on. Returns a list of result dicts: the RESULT_KEYS
+    (None where a case does not sweep that parameter) plus measure()'s numbers.
+    progress, if given, is called with each result as it completes.
+    """
+    sweeps = {'voices': voices, 'waveform': waveforms, 'lfo_shape': lfo_shapes}
+    results = []
+    for case in cases or CASES:
+        build, swept = CASES[case]
+        for frame_count in buffer_sizes:
+            for values in itertools.product(*(sweeps[name] for name in swept)):
+                params = dict(zip(swept, values))
+                render = build(sample_rate, frame_count, params)
+                result = {
+                    'case': case,
+                    'buffer_size': frame_count,
+                    'voices': params.get('voices'),
+                    'waveform': params.get('waveform'),
+                    'lfo_shape': params.get('lfo_shape'),
+                }
+                result.update(measure(render, frame_count, sample_rate, seconds, repeats))
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
+
+
+def result_key(result):
+    return tuple(result.get(name) for name in RESULT_KEYS)
+
+
+def compare(baseline, results, threshold=0.10):
+    """
+    Match 'results' against a baseline run (by RESULT_KEYS) and return the
+    regressions: results whose ns_per_sample grew by more than 'threshold'
+    (a fraction) or that allocate more than ALLOCATION_SLACK bytes more per
+    block, as (result, baseline_result).
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        slower = result['ns_per_sample'] > before['ns_per_sample'] * (1.0 + threshold)
+        if slower or result['alloc_bytes_per_block'] > before['alloc_bytes_per_block'] + ALLOCATION_SLACK:
+            regressions.append((result, before))
+    return regressions
+
+
+def _describe(result):
+    params = [f"{name}={result[name]}" for name in RESULT_KEYS[1:] if result[name] is not None]
+    return f"{result['case']:<12} " + " ".join(params)
+
+
+def _parse_list(text, convert=str):
+    return tuple(convert(item) for item in text.split(',') if item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the DSP modules and the full chain headlessly, writing JSON results."
+    )
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON file to write")
+    parser.add_argument("--cases", type=_parse_list, default=tuple(CASES),
+                        help="comma-separated cases: " + ",".join(CASES))
+    parser.add_argument("--buffer-sizes", type=lambda text: _parse_list(text, int), default=BUFFER_SIZES)
+    parser.add_argument("--voices", type=lambda text: _parse_list(text, int), default=VOICE_COUNTS)
+    parser.add_argument("--waveforms", type=_parse_list, default=WAVEFORMS)
+    parser.add_argument("--lfo-shapes", type=_parse_list, default=LFO_WAVES)
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--seconds", type=float, default=0.5, help="audio rendered per timing repeat")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", default=None, help="earlier JSON output to compare against; exit status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown (fraction) counted as a regression")
+    args = parser.parse_args(argv)
+
+    unknown = [case for case in args.cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    def progress(result):
+        print(f"{_describe(result):<56} {result['ns_per_sample']:9.1f} ns/sample  "
+              f"RTF {result['rtf']:.4f}  {result['alloc_bytes_per_block']:7d} B/block")
+
+    results = run_benchmarks(args.cases, args.buffer_sizes, args.voices, args.waveforms, args.lfo_shapes,
+                             args.sample_rate, args.seconds, args.repeats, progress)
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'sample_rate': args.sample_rate,
+            'seconds': args.seconds,
+            'repeats': args.repeats,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(results)} results -> {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(baseline, results, args.threshold)
+        for result, before in regressions:
+            print(f"REGRESSION {_describe(result)}: "
+                  f"{before['ns_per_sample']:.1f} -> {result['ns_per_sample']:.1f} ns/sample, "
+                  f"{before['alloc_bytes_per_block']} -> {result['alloc_bytes_per_block']} B/block")
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        report['regressions'] = len(regressions)
+    return report
+
+
+if __name__ == "__main__":
+    # Non-zero when a --baseline comparison found regressions, so CI can fail on them
+    sys.exit(1 if main().get('regressions') else 0)
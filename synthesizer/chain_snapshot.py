@@ -0,0 +1,71 @@
+# synthesizer/chain_snapshot.py
+
+import numpy as np
+
+from modules.buffers import sample_ramp
+
+# Length of the wet/dry fade when a module enters or leaves the chain (seconds)
+CHAIN_FADE_TIME = 0.01
+
+
+class ChainEntry:
+    """
+    One module in a ModuleChainManager snapshot, with its fade state.
+
+    A snapshot is an immutable tuple of entries, rebuilt by every chain edit
+    and picked up by the audio thread once per block. A module entering the
+    chain first renders silently for one fade length (priming delay lines and
+    filters with its new input, so it does not start from stale or empty state),
+    then fades from dry (its input passed through) to wet; a module leaving
+    fades from wet to dry and is then skipped until the next edit drops it.
+    A moved module fades out where it was, then fades in at its new place
+    ('after'), starting on the first render call after the fade-out ended, so
+    it never renders twice for the same samples.
+
+    Only the audio thread advances 'position'; edits create new entries.
+    """
+    __slots__ = ('module', 'fade', 'length', 'position', 'after')
+
+    def __init__(self, module, fade=None, length=1, position=0, after=None):
+        self.module = module
+        self.fade = fade            # None (steady), 'in' or 'out'
+        self.length = max(1, int(length))
+        self.position = position    # samples of the fade rendered so far (negative: priming)
+        self.after = after          # entry whose fade-out must end first
+
+    @property
+    def removing(self):
+        return self.fade == 'out'
+
+    @property
+    def finished(self):
+        """A completed fade-out: the module is silent and can be dropped."""
+        return self.fade == 'out' and self.position >= self.length
+
+    @property
+    def level(self):
+        """Current wet level, 0..1."""
+        if self.fade is None:
+            return 1.0
+        progress = min(max(self.position / self.length, 0.0), 1.0)
+        return progress if self.fade == 'in' else 1.0 - progress
+
+    def faded_out(self, length):
+        """A new entry fading this module out from its current level."""
+        return ChainEntry(self.module, 'out', length, int(round((1.0 - self.level) * length)))
+
+    def gains(self, out):
+        """
+        Write the wet level for the next len(out) samples into 'out' (float32)
+        and advance the fade. Returns None once a fade-in has completed.
+        """
+        if self.fade == 'in' and self.position >= self.length:
+            return None
+        num_samples = out.shape[0]
+        np.add(sample_ramp(num_samples, np.float32), float(self.position + 1), out=out)
+        out *= 1.0 / self.length
+        np.clip(out, 0.0, 1.0, out=out)
+        if self.fade == 'out':
+            np.subtract(1.0, out, out=out)
+        self.position += num_samples
+        return out
@@ -0,0 +1,168 @@
+import operator
+import time
+
+
+_OFFSET = operator.itemgetter(0)
+
+
+class NoteEvent:
+    """A note on/off with the moment it happened (perf_counter seconds)."""
+    __slots__ = ("timestamp", "midi_note", "is_press", "source")
+
+    def __init__(self, timestamp, midi_note, is_press, source="user"):
+        self.timestamp = timestamp
+        self.midi_note = midi_note
+        self.is_press = is_press
+        self.source = source
+
+
+class SPSCQueue:
+    """
+    Bounded, lock-free single-producer/single-consumer queue of note events.
+
+    Slots are preallocated NoteEvent objects that get overwritten in place. The
+    producer only ever writes 'tail' and the consumer only ever writes 'head'; a
+    slot is filled before 'tail' is published and read before 'head' is, so
+    neither side needs a lock or ever waits on the other. When the queue is full
+    the event is dropped and counted instead of blocking the input thread.
+    """
+    def __init__(self, capacity=256):
+        # Round up to a power of two so indices can be masked instead of wrapped
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self.mask = size - 1
+        self.slots = [NoteEvent(0.0, 0, False) for _ in range(size)]
+
+        self.head = 0  # next slot to read (written by the consumer only)
+        self.tail = 0  # next slot to write (written by the producer only)
+        self.dropped = 0
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def push(self, timestamp, midi_note, is_press, source="user"):
+        """
+        Producer side. Returns False (and counts a drop) if the queue is full.
+        """
+        tail = self.tail
+        if tail - self.head >= self.capacity:
+            self.dropped += 1
+            return False
+        slot = self.slots[tail & self.mask]
+        slot.timestamp = timestamp
+        slot.midi_note = midi_note
+        slot.is_press = is_press
+        slot.source = source
+        self.tail = tail + 1
+        return True
+
+    def peek(self):
+        """
+        Consumer side: the oldest queued event, or None. The slot stays owned
+        by the consumer until pop() is called.
+        """
+        head = self.head
+        if head == self.tail:
+            return None
+        return self.slots[head & self.mask]
+
+    def pop(self):
+        """
+        Consumer side: release the slot returned by peek().
+        """
+        self.head += 1
+
+
+class EventScheduler:
+    """
+    Places timestamped note events at sample offsets inside the audio block.
+
+    Input threads call push(...), which only stamps the event and writes it to a
+    lock-free SPSCQueue. Each producer thread needs its own queue: push(...) feeds
+    the default one, add_input_queue() creates more (e.g. for a MIDI thread).
+    Once per block the audio callback calls collect_block(frame_count): every event
+    that arrived during the previous block is mapped to the same relative position
+    inside the block being rendered. This trades a constant one-block latency for
+    zero timing jitter, independent of the device buffer size.
+    """
+    def __init__(self, sample_rate=44100, clock=time.perf_counter, queue_capacity=256):
+        self.sample_rate = sample_rate
+        self.clock = clock
+        self.queue_capacity = queue_capacity
+        self.queue = SPSCQueue(queue_capacity)
+        self.queues = [self.queue]
+
+        # Estimated wall time at which the previous block started
+        self.block_start_time = None
+        # Reused by collect_block, so draining the queues allocates no new list
+        self._events = []
+
+    def add_input_queue(self):
+        """
+        Create the queue for an additional producer thread. Call this before the
+        stream starts; the callback drains every registered queue once per block.
+        """
+        queue = SPSCQueue(self.queue_capacity)
+        self.queues = self.queues + [queue]
+        return queue
+
+    def push(self, midi_note, is_press, source="user", timestamp=None):
+        """
+        Queue a note event from the default input thread. Never blocks;
+        returns False if the queue was full and the event had to be dropped.
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+        return self.queue.push(timestamp, midi_note, is_press, source)
+
+    @property
+    def dropped(self):
+        return sum(queue.dropped for queue in self.queues)
+
+    def _advance_block_clock(self, frame_count):
+        """
+        Returns the start time of the window whose events go into this block.
+        The block clock advances by exactly one block per callback and only resyncs
+        to the wall clock when it drifts by more than a block (e.g. after a stall),
+        so callback scheduling jitter does not leak into event offsets.
+        """
+        now = self.clock()
+        block_duration = frame_count / self.sample_rate
+        if self.block_start_time is None:
+            window_start = now - block_duration
+        else:
+            window_start = self.block_start_time
+            expected_now = window_start + block_duration
+            if abs(now - expected_now) > block_duration:
+                window_start = now - block_duration
+        self.block_start_time = window_start + block_duration
+        return window_start
+
+    def collect_block(self, frame_count):
+        """
+        Drain the queued events and return them as a list of
+        (offset, midi_note, is_press, source), sorted by sample offset.
+        The list is reused by the next call.
+        """
+        window_start = self._advance_block_clock(frame_count)
+        window_end = self.block_start_time
+
+        events = self._events
+        events.clear()
+        for queue in self.queues:
+            event = queue.peek()
+            while event is not None:
+                if event.timestamp >= window_end:
+                    # Arrived after this callback started; belongs to the next block
+                    break
+                offset = int((event.timestamp - window_start) * self.sample_rate)
+                offset = min(max(offset, 0), frame_count - 1)
+                events.append((offset, event.midi_note, event.is_press, event.source))
+                queue.pop()
+                event = queue.peek()
+
+        if len(events) > 1:
+            events.sort(key=_OFFSET)
+        return events
@@ -0,0 +1,368 @@
+# synthesizer/graph.py
+
+import time
+
+import numpy as np
+
+from modules.buffers import BufferPool
+
+# Name of the graph's sink: whatever is connected to it is the graph's output
+OUTPUT = "output"
+
+
+def _num_inputs(module):
+    # Modules take one input unless they declare more (e.g. MixerModule)
+    return getattr(module, 'num_inputs', 1)
+
+
+class Connection:
+    """
+    One edge of a ProcessingGraph: 'source' feeds input 'port' of 'destination',
+    scaled by 'gain'. Several connections into the same port are summed.
+    """
+    def __init__(self, source, destination, port=0, gain=1.0):
+        self.source = source
+        self.destination = destination
+        self.port = port
+        self.gain = float(gain)
+
+
+class ProcessingGraph:
+    """
+    A directed acyclic graph of modules, rendered by ModuleChainManager instead
+    of the linear chain.
+
+    Nodes are modules added under a name; connect(source, destination) routes
+    one node's output into another's input. The usual layouts are all plain
+    connections:
+      - layers: several synth nodes connected to the same mixer or to OUTPUT,
+      - splits: one node connected to several destinations,
+      - mixers: a MixerModule node with one port per input (or any port fed by
+        several connections, which are summed),
+      - send/return buses: send(source, bus, level) feeds an effect node at a
+        level, and the effect's connection to OUTPUT is the return,
+      - multi-input modules: modules with num_inputs > 1 receive one block per
+        port as a tuple.
+
+    Every structural edit bumps 'version' and calls on_change(graph), which the
+    ModuleChainManager uses to recompile its ExecutionPlan right away (on the
+    editing thread), so the audio thread never walks the graph itself.
+    Changing a connection's gain takes effect at the next block without a
+    recompile.
+    """
+    def __init__(self):
+        self.nodes = {}        # name -> module, in insertion order
+        self.connections = []
+        self.version = 0
+        self.on_change = None
+
+    # ─────────────────────────────────────────────────────────
+    # Editing
+    # ─────────────────────────────────────────────────────────
+    def add_node(self, name, module):
+        if name == OUTPUT or name in self.nodes:
+            raise ValueError(f"Graph already has a node named {name!r}")
+        self.nodes[name] = module
+        self._changed()
+        return name
+
+    def remove_node(self, name):
+        if name not in self.nodes:
+            raise KeyError(name)
+        del self.nodes[name]
+        self.connections = [
+            c for c in self.connections if c.source != name and c.destination != name
+        ]
+        self._changed()
+
+    def connect(self, source, destination, port=0, gain=1.0):
+        """
+        Route 'source' into input 'port' of 'destination' (a node or OUTPUT).
+        Connecting the same pair and port again only updates the gain.
+        """
+        if source not in self.nodes:
+            raise KeyError(source)
+        if destination != OUTPUT and destination not in self.nodes:
+            raise KeyError(destination)
+        num_ports = 1 if destination == OUTPUT else _num_inputs(self.nodes[destination])
+        if not 0 <= port < num_ports:
+            raise ValueError(f"{destination!r} has no input port {port}")
+
+        existing = self._find(source, destination, port)
+        if existing is not None:
+            existing.gain = float(gain)
+            return existing
+        if source == destination or self._reaches(destination, source):
+            raise ValueError(f"Connecting {source!r} -> {destination!r} would create a cycle")
+
+        connection = Connection(source, destination, port, gain)
+        self.connections.append(connection)
+        self._changed()
+        return connection
+
+    def disconnect(self, source, destination, port=None):
+        """
+        Remove the connection(s) from 'source' to 'destination' (all ports if
+        'port' is None).
+        """
+        kept = [
+            c for c in self.connections
+            if not (c.source == source and c.destination == destination
+                    and (port is None or c.port == port))
+        ]
+        if len(kept) != len(self.connections):
+            self.connections = kept
+            self._changed()
+
+    def chain(self, *names):
+        """
+        Connect the named nodes in series (the last one may be OUTPUT).
+        """
+        for source, destination in zip(names, names[1:]):
+            self.connect(source, destination)
+
+    def send(self, source, bus, level):
+        """
+        Feed 'source' into the bus node 'bus' at 'level' (a post-fader send).
+        """
+        return self.connect(source, bus, gain=level)
+
+    def set_gain(self, source, destination, gain, port=0):
+        connection = self._find(source, destination, port)
+        if connection is None:
+            raise KeyError((source, destination, port))
+        connection.gain = float(gain)
+
+    def _find(self, source, destination, port):
+        for connection in self.connections:
+            if (connection.source == source and connection.destination == destination
+                    and connection.port == port):
+                return connection
+        return None
+
+    def _reaches(self, start, target):
+        # Depth-first search along the connections
+        stack = [start]
+        seen = set()
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name in seen:
+                continue
+            seen.add(name)
+            stack.extend(c.destination for c in self.connections if c.source == name)
+        return False
+
+    def _changed(self):
+        self.version += 1
+        if self.on_change is not None:
+            self.on_change(self)
+
+    # ─────────────────────────────────────────────────────────
+    # Compilation
+    # ─────────────────────────────────────────────────────────
+    def topological_order(self):
+        """
+        Node names ordered so every node comes after all of its sources
+        (Kahn's algorithm; ties keep insertion order).
+        """
+        pending = {name: 0 for name in self.nodes}
+        for connection in self.connections:
+            if connection.destination != OUTPUT:
+                pending[connection.destination] += 1
+
+        ready = [name for name in self.nodes if pending[name] == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for connection in self.connections:
+                if connection.source == name and connection.destination != OUTPUT:
+                    pending[connection.destination] -= 1
+                    if pending[connection.destination] == 0:
+                        ready.append(connection.destination)
+
+        if len(order) != len(self.nodes):
+            stuck = [name for name in self.nodes if name not in order]
+            raise ValueError(f"Processing graph has a cycle through {stuck}")
+        return order
+
+    def compile(self):
+        """
+        Flatten the graph into an ExecutionPlan: one step per node, ordered by
+        dependency level (a node's level is one more than its deepest source),
+        each with preassigned buffers.
+
+        Buffer slots are reused once their last reader's level has run (a node's
+        output lives until its last destination; port sums only for their
+        level), so a long serial chain needs a handful of buffers, not one per
+        node. Slot 0 is the plan's temporary for scaled contributions.
+        """
+        order = self.topological_order()
+        level = {}
+        for name in order:
+            source_levels = [level[c.source] for c in self.connections if c.destination == name]
+            level[name] = max(source_levels) + 1 if source_levels else 0
+        num_levels = max(level.values()) + 1 if level else 0
+        # Still topological: every source sits on a lower level
+        order.sort(key=level.get)
+
+        last_read = {name: -1 for name in order}
+        for connection in self.connections:
+            reader = num_levels if connection.destination == OUTPUT else level[connection.destination]
+            last_read[connection.source] = max(last_read[connection.source], reader)
+
+        free = []
+        count = [1]
+
+        def take():
+            if free:
+                return free.pop()
+            count[0] += 1
+            return count[0] - 1
+
+        output_slot = {}
+
+        def gather_ports(destination, num_ports):
+            ports = []
+            for port in range(num_ports):
+                contributions = tuple(
+                    (output_slot[c.source], c) for c in self.connections
+                    if c.destination == destination and c.port == port
+                )
+                ports.append((contributions, take() if contributions else None))
+            return tuple(ports)
+
+        steps = []
+        levels = []
+        for current in range(num_levels):
+            level_steps = []
+            for name in order:
+                if level[name] != current:
+                    continue
+                module = self.nodes[name]
+                ports = gather_ports(name, _num_inputs(module))
+                out = take()
+                output_slot[name] = out
+                level_steps.append(PlanStep(name, module, ports, out))
+            steps.extend(level_steps)
+            levels.append(level_steps)
+
+            # Slots are released only once the whole level is done, since the
+            # steps of one level may run at the same time (ParallelRenderer)
+            for step in level_steps:
+                for _, sum_slot in step.ports:
+                    if sum_slot is not None:
+                        free.append(sum_slot)
+                if last_read[step.name] == -1:
+                    # Nobody reads this node (e.g. an arpeggiator that only sends notes)
+                    free.append(step.out)
+            for source, slot in output_slot.items():
+                if last_read[source] == current:
+                    free.append(slot)
+
+        output_ports = gather_ports(OUTPUT, 1)
+        return ExecutionPlan(steps, levels, output_ports[0], count[0], self.version)
+
+
+class PlanStep:
+    """
+    One node of a compiled plan: the module, where each input port reads from
+    ((slot, connection), ...) plus the slot its sum goes to, and its output slot.
+    """
+    __slots__ = ('name', 'module', 'ports', 'out', 'accepts_out', 'multi_input')
+
+    def __init__(self, name, module, ports, out):
+        self.name = name
+        self.module = module
+        self.ports = ports
+        self.out = out
+        self.accepts_out = getattr(module, 'accepts_out', False)
+        self.multi_input = _num_inputs(module) > 1
+
+
+class ExecutionPlan:
+    """
+    A ProcessingGraph compiled into a flat list of steps. run(frame_count)
+    executes them in order against the plan's own BufferPool and returns the
+    graph output (a pool buffer, valid until the next run).
+
+    'levels' groups the steps by dependency depth: the steps of one level only
+    read outputs of earlier levels and write slots no other step of the level
+    touches, so they may run concurrently.
+    """
+    def __init__(self, steps, levels, output_port, num_buffers, version):
+        self.steps = steps
+        self.levels = levels
+        self.output_port = output_port
+        self.version = version
+        self.pool = BufferPool(count=num_buffers)
+        self.modules = [step.module for step in steps]
+        # EngineProfiler timing every step, when profiling is enabled
+        self.profiler = None
+        # Most steps any level could run at once
+        self.width = max((len(level) for level in levels), default=0)
+
+    @property
+    def num_buffers(self):
+        return self.pool.count
+
+    def _gather(self, port, num_samples):
+        # Sum of one input port's connections (None if nothing is connected)
+        contributions, sum_slot = port
+        if not contributions:
+            return None
+        pool = self.pool
+        first_slot, first = contributions[0]
+        if len(contributions) == 1 and first.gain == 1.0:
+            return pool.get(first_slot, num_samples)
+
+        total = pool.get(sum_slot, num_samples)
+        np.multiply(pool.get(first_slot, num_samples), first.gain, out=total)
+        for slot, connection in contributions[1:]:
+            source = pool.get(slot, num_samples)
+            if connection.gain == 1.0:
+                total += source
+            else:
+                scaled = pool.get(0, num_samples)
+                np.multiply(source, connection.gain, out=scaled)
+                total += scaled
+        return total
+
+    def step_input(self, step, num_samples):
+        """
+        The input_audio a step's module receives (a tuple for multi-input modules).
+        Sums use the shared slot 0, so call this from one thread at a time.
+        """
+        if step.multi_input:
+            return tuple(self._gather(port, num_samples) for port in step.ports)
+        return self._gather(step.ports[0], num_samples)
+
+    def render_step(self, step, input_audio, num_samples):
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        out = self.pool.get(step.out, num_samples)
+        if step.accepts_out:
+            result = step.module.generate(num_samples, input_audio, out=out)
+        else:
+            result = step.module.generate(num_samples, input_audio)
+        if result is not out:
+            # Pass-through or module-owned array: the slot must hold the output
+            np.copyto(out, result, casting='same_kind')
+        if profiler is not None:
+            profiler.add_module_time(step.module, time.perf_counter() - start, step.name)
+
+    def output(self, num_samples):
+        output = self._gather(self.output_port, num_samples)
+        if output is None:
+            output = self.pool.get(0, num_samples)
+            output.fill(0.0)
+        return output
+
+    def run(self, frame_count):
+        self.pool.reserve(frame_count)
+        for step in self.steps:
+            self.render_step(step, self.step_input(step, frame_count), frame_count)
+        return self.output(frame_count)
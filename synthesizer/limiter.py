@@ -1,45 +1,228 @@
+import math
+
 import numpy as np
 
+from modules.buffers import ScratchBuffers, sample_ramp
+
+# Gain reduction below this is treated as none (the release is computed in the
+# log domain, where exactly zero has no logarithm)
+_MIN_REDUCTION = 1e-9
+# Once the gain is this close to 1 everywhere, blocks under the threshold skip the gain math
+_SETTLED = 1e-6
+
+# True-peak detector: 4x oversampling, i.e. 3 points between every two samples,
+# each interpolated from the 8 samples around it (Hann-windowed sinc)
+_TRUE_PEAK_PHASES = (0.25, 0.5, 0.75)
+_TRUE_PEAK_HALF = 4
+_TRUE_PEAK_OFFSETS = tuple(range(1 - _TRUE_PEAK_HALF, _TRUE_PEAK_HALF + 1))
+
+
+def _true_peak_kernel():
+    offsets = np.array(_TRUE_PEAK_OFFSETS, dtype=np.float64)
+    rows = []
+    for phase in _TRUE_PEAK_PHASES:
+        distance = phase - offsets
+        taps = np.sinc(distance) * (0.5 + 0.5 * np.cos(np.pi * distance / _TRUE_PEAK_HALF))
+        rows.append(tuple(float(tap) for tap in taps / taps.sum()))
+    return tuple(rows)
+
+
+_TRUE_PEAK_KERNEL = _true_peak_kernel()
+
+
 class Limiter:
-    def __init__(self, sample_rate, threshold=1.0, attack_time=0.01, release_time=0.01):
+    """
+    Lookahead peak limiter with a per-sample gain envelope.
+
+    The audio is delayed by 'latency' samples, so the gain can start falling
+    before a peak arrives. Per block:
+      1. detect the level of every sample (|x|, or the 4x oversampled true
+         peak with true_peak=True),
+      2. take the maximum over the lookahead window (sliding max),
+      3. turn it into the gain that brings it down to the threshold,
+      4. let gain reduction fade out exponentially ('release_time'),
+      5. average the gain over the lookahead window, which ramps it down
+         linearly over 'attack_time' and lands on the target exactly when the
+         peak comes out of the delay, so the delayed audio never overshoots.
+
+    Every step is a few whole-block array passes, done in reused buffers;
+    blocks below the threshold with no reduction left only pass the delay.
+    """
+    def __init__(self, sample_rate, threshold=1.0, attack_time=0.005, release_time=0.05,
+                 true_peak=False):
         """
         sample_rate:   The audio sample rate (e.g. 44100).
         threshold:     The maximum absolute amplitude we want (e.g., 1.0 for -1..+1 range).
-        attack_time:   How quickly the limiter reduces gain if we exceed threshold (seconds).
-        release_time:  How quickly the limiter restores gain if we are below threshold (seconds).
+        attack_time:   The lookahead: how long the gain takes to come down before a peak (seconds).
+        release_time:  Time constant of the gain recovering after a peak (seconds).
+        true_peak:     Also catch peaks between samples (4x oversampled, 8-point interpolation: close,
+                       not exact, for full-band material). Adds 4 samples of latency.
         """
         self.sample_rate = sample_rate
         self.threshold = threshold
-        
-        # Convert times to "coefficients" for exponential smoothing:
-        # The shorter the time, the bigger (1 - exp(-1/(sr*time))) is, so gain changes faster.
-        self.attack_coef  = np.exp(-1.0 / (sample_rate * attack_time))
-        self.release_coef = np.exp(-1.0 / (sample_rate * release_time))
-        
-        # current_gain tracks how much attenuation or boost is currently being applied.
+        self.attack_time = attack_time
+        self.release_time = release_time
+        self.true_peak = true_peak
+
+        # The interpolating detector reads 3 samples before the lookahead window
+        minimum = _TRUE_PEAK_HALF if true_peak else 1
+        self.lookahead = max(minimum, int(round(attack_time * sample_rate)))
+        # The true-peak detector needs 4 samples after the point it measures
+        self._detector_delay = _TRUE_PEAK_HALF if true_peak else 0
+        self.latency = self.lookahead + self._detector_delay
+        # Log of the per-sample release coefficient
+        self._log_release = -1.0 / (sample_rate * release_time)
+
+        self._scratch = ScratchBuffers()
+        self.reset()
+
+    @property
+    def latency_seconds(self):
+        return self.latency / self.sample_rate
+
+    def reset(self):
+        self._audio_history = np.zeros(self.latency, dtype=np.float32)
+        self._peak_history = np.zeros(self.lookahead, dtype=np.float32)
+        self._gain_history = np.ones(self.lookahead, dtype=np.float64)
+        self._reduction = 0.0
+        self._settled = True
+        # Gain applied to the last sample of the previous block (for meters)
         self.current_gain = 1.0
 
     def process_block(self, audio_block):
         """
-        Apply limiter to a block of audio samples (NumPy array).
-        Returns a new array with the limiter gain applied.
+        Apply limiter to a block of audio samples (float32 NumPy array).
+        The result, delayed by 'latency' samples, is written in place and the
+        same array is returned.
         """
-        # 1) Measure peak of the block
-        block_peak = np.max(np.abs(audio_block))
-        
-        # 2) Determine the desired gain for this block
-        if block_peak > self.threshold and block_peak > 0:
-            desired_gain = self.threshold / block_peak
-        else:
-            desired_gain = 1.0  # No need to attenuate
-        
-        # 3) Smoothly transition to the desired gain
-        if desired_gain < self.current_gain:
-            # If we need to turn down, we use the attack time (fast change).
-            self.current_gain += (desired_gain - self.current_gain) * (1.0 - self.attack_coef)
+        num_samples = audio_block.shape[0]
+        if num_samples == 0:
+            return audio_block
+        lookahead = self.lookahead
+        latency = self.latency
+        threshold = float(self.threshold)
+        scratch = self._scratch
+
+        delayed = scratch.get('delayed', latency + num_samples, np.float32)
+        delayed[:latency] = self._audio_history
+        delayed[latency:] = audio_block
+
+        # 1) Level of the newest detector samples, after the previous lookahead window
+        levels = scratch.get('levels', lookahead + num_samples, np.float32)
+        levels[:lookahead] = self._peak_history
+        incoming = levels[lookahead:]
+        if self.true_peak:
+            self._detect_true_peak(delayed, incoming)
         else:
-            # If we can turn up, we use the release time (slower change).
-            self.current_gain += (desired_gain - self.current_gain) * (1.0 - self.release_coef)
+            np.abs(audio_block, out=incoming)
+        self._peak_history[:] = levels[num_samples:]
+
+        if self._settled and float(np.max(incoming)) <= threshold:
+            # Nothing to limit and no reduction fading out: only the delay
+            np.copyto(audio_block, delayed[:num_samples])
+            self._audio_history[:] = delayed[num_samples:]
+            return audio_block
+
+        # 2) Loudest level in the lookahead window ending at every sample
+        held = scratch.get('held', num_samples, np.float32)
+        self._sliding_max(levels, held)
+
+        # 3) Gain that brings it down to the threshold (1 where it is below)
+        gains = scratch.get('gains', lookahead + num_samples, np.float64)
+        gains[:lookahead] = self._gain_history
+        gain = gains[lookahead:]
+        np.maximum(held, threshold, out=held)
+        np.copyto(gain, held)
+        np.divide(threshold, gain, out=gain)
+
+        # 4) Release: reduction r = 1 - gain falls by exp(log_release) per sample,
+        #    r_out[t] = max(r[t], r_out[t-1] * coef). In the log domain that is a
+        #    running maximum of log r[k] - k * log_release, shifted back.
+        np.subtract(1.0, gain, out=gain)
+        np.maximum(gain, _MIN_REDUCTION, out=gain)
+        np.log(gain, out=gain)
+        decay = scratch.get('decay', num_samples)
+        np.multiply(sample_ramp(num_samples), self._log_release, out=decay)
+        gain -= decay
+        np.maximum.accumulate(gain, out=gain)
+        carried = math.log(max(self._reduction, _MIN_REDUCTION)) + self._log_release
+        np.maximum(gain, carried, out=gain)
+        gain += decay
+        np.exp(gain, out=gain)
+        self._reduction = float(gain[-1])
+        np.subtract(1.0, gain, out=gain)
+
+        # 5) Attack: average over the lookahead window (running-sum difference)
+        sums = scratch.get('sums', lookahead + num_samples + 1)
+        sums[0] = 0.0
+        np.cumsum(gains, out=sums[1:])
+        smooth = scratch.get('smooth', num_samples)
+        np.subtract(sums[lookahead + 1:], sums[:num_samples], out=smooth)
+        smooth *= 1.0 / (lookahead + 1)
+        self._gain_history[:] = gains[num_samples:]
+
+        # 6) Apply to the delayed audio
+        envelope = scratch.get('envelope', num_samples, np.float32)
+        np.copyto(envelope, smooth, casting='same_kind')
+        np.multiply(delayed[:num_samples], envelope, out=audio_block)
+        self._audio_history[:] = delayed[num_samples:]
+        self.current_gain = float(envelope[-1])
+        self._settled = (self._reduction < _SETTLED
+                         and float(np.min(self._gain_history)) > 1.0 - _SETTLED)
+        return audio_block
+
+    # ─────────────────────────────────────────────────────────
+    # Detector helpers
+    # ─────────────────────────────────────────────────────────
+    def _sliding_max(self, levels, out):
+        """
+        out[i] = max(levels[i : i + lookahead + 1]), by van Herk / Gil-Werman:
+        split into window-sized chunks, take running maxima forwards and
+        backwards inside each chunk; every window spans at most two chunks.
+        """
+        window = self.lookahead + 1
+        num_samples = out.shape[0]
+        length = levels.shape[0]
+        num_chunks = -(-length // window)
+        scratch = self._scratch
+
+        chunks = scratch.get('chunks', (num_chunks, window), np.float32)
+        flat = chunks.reshape(-1)
+        flat[:length] = levels
+        flat[length:] = 0.0
+        prefix = scratch.get('prefix', (num_chunks, window), np.float32)
+        suffix = scratch.get('suffix', (num_chunks, window), np.float32)
+        np.maximum.accumulate(chunks, axis=1, out=prefix)
+        np.maximum.accumulate(chunks[:, ::-1], axis=1, out=suffix[:, ::-1])
+        np.maximum(suffix.reshape(-1)[:num_samples],
+                   prefix.reshape(-1)[self.lookahead:self.lookahead + num_samples], out=out)
+
+    def _detect_true_peak(self, delayed, out):
+        """
+        Level of the newest detector samples including the peaks between them:
+        |x[t]| and the interpolated maxima of the intervals (t-1, t) and (t, t+1).
+        Detector sample i is input sample i - 4 of the block (the interpolation
+        needs 4 samples after it), hence the extra latency.
+        """
+        num_samples = out.shape[0]
+        scratch = self._scratch
+        # Index in 'delayed' of the first detector sample
+        first = self.latency - self._detector_delay
+
+        # Interval peaks for the n + 1 intervals starting at first - 1 .. first + n - 1
+        intervals = scratch.get('tp_intervals', num_samples + 1, np.float32)
+        value = scratch.get('tp_value', num_samples + 1, np.float32)
+        term = scratch.get('tp_term', num_samples + 1, np.float32)
+        intervals.fill(0.0)
+        for taps in _TRUE_PEAK_KERNEL:
+            value.fill(0.0)
+            for offset, tap in zip(_TRUE_PEAK_OFFSETS, taps):
+                start = first - 1 + offset
+                np.multiply(delayed[start:start + num_samples + 1], tap, out=term)
+                value += term
+            np.abs(value, out=value)
+            np.maximum(intervals, value, out=intervals)
 
-        # 4) Apply the current gain
-        return audio_block * self.current_gain
\ No newline at end of file
+        np.abs(delayed[first:first + num_samples], out=out)
+        np.maximum(out, intervals[1:], out=out)
+        np.maximum(out, intervals[:num_samples], out=out)
@@ -0,0 +1,112 @@
+# synthesizer/midi_file.py
+
+import struct
+
+# Data bytes that follow each channel message status (high nibble)
+_DATA_LENGTH = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+
+# Microseconds per quarter note until the file sets a tempo (120 BPM)
+_DEFAULT_TEMPO = 500000
+
+
+def _read_varlen(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def _read_track(data, track_index):
+    """
+    Yield (tick, track, kind, payload) for the tempo changes and notes of one
+    MTrk chunk: ('tempo', microseconds) and ('note', (note, is_press, channel)).
+    """
+    pos = 0
+    tick = 0
+    status = None
+    while pos < len(data):
+        delta, pos = _read_varlen(data, pos)
+        tick += delta
+        byte = data[pos]
+        if byte & 0x80:
+            pos += 1
+            if byte < 0xF0:
+                status = byte  # running status applies to channel messages only
+        elif status is None:
+            raise ValueError("MIDI data byte without a status")
+        else:
+            byte = status
+
+        if byte == 0xFF:
+            meta_type = data[pos]
+            length, pos = _read_varlen(data, pos + 1)
+            if meta_type == 0x51 and length == 3:
+                yield tick, track_index, 'tempo', int.from_bytes(data[pos:pos + 3], 'big')
+            elif meta_type == 0x2F:
+                return
+            pos += length
+        elif byte in (0xF0, 0xF7):
+            length, pos = _read_varlen(data, pos)
+            pos += length
+        else:
+            kind = byte & 0xF0
+            channel = byte & 0x0F
+            payload = data[pos:pos + _DATA_LENGTH[kind]]
+            pos += _DATA_LENGTH[kind]
+            if kind == 0x90 and payload[1] > 0:
+                yield tick, track_index, 'note', (payload[0], True, channel)
+            elif kind == 0x80 or kind == 0x90:
+                yield tick, track_index, 'note', (payload[0], False, channel)
+
+
+def read_midi_notes(path):
+    """
+    Read a Standard MIDI File (format 0 or 1) and return its notes as a list of
+    (seconds, midi_note, is_press, channel), in time order.
+
+    Tempo changes from any track apply to all of them; note-on with velocity 0
+    counts as note-off. Everything other than notes and tempo is skipped.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != b'MThd':
+        raise ValueError(f"{path} is not a Standard MIDI File")
+    header_length = struct.unpack('>I', data[4:8])[0]
+    _, num_tracks, division = struct.unpack('>HHH', data[8:14])
+
+    events = []
+    pos = 8 + header_length
+    for track_index in range(num_tracks):
+        chunk_type = data[pos:pos + 4]
+        length = struct.unpack('>I', data[pos + 4:pos + 8])[0]
+        if chunk_type == b'MTrk':
+            events.extend(_read_track(data[pos + 8:pos + 8 + length], track_index))
+        pos += 8 + length
+    # Stable sort on the tick: at the same tick, tracks keep file order
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    if division & 0x8000:
+        # SMPTE time: frames per second (stored negated) times ticks per frame
+        fps = 256 - (division >> 8)
+        seconds_per_tick = 1.0 / (fps * (division & 0xFF))
+    else:
+        seconds_per_tick = None
+
+    notes = []
+    tempo = _DEFAULT_TEMPO
+    last_tick = 0
+    seconds = 0.0
+    for tick, _, kind, payload in events:
+        if seconds_per_tick is None:
+            seconds += (tick - last_tick) * tempo / 1e6 / division
+        else:
+            seconds += (tick - last_tick) * seconds_per_tick
+        last_tick = tick
+        if kind == 'tempo':
+            tempo = payload
+        else:
+            notes.append((seconds, payload[0], payload[1], payload[2]))
+    return notes
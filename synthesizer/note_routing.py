@@ -0,0 +1,63 @@
+# synthesizer/note_routing.py
+
+MIDI_CHANNELS = 16
+
+# Event source of each MIDI channel (0-15), built once so dispatch never formats strings
+_MIDI_SOURCES = tuple(f"midi:{channel}" for channel in range(MIDI_CHANNELS))
+
+
+def midi_source(channel):
+    """The event source for notes received on MIDI channel 'channel' (0-15)."""
+    return _MIDI_SOURCES[channel]
+
+
+def _listens(module, channel):
+    # midi_channel None (the default) means every channel
+    wanted = getattr(module, 'midi_channel', None)
+    return wanted is None or wanted == channel
+
+
+def _handlers(modules):
+    # Indexed by is_press: (note_off handlers, note_on handlers)
+    return (tuple(module.note_off for module in modules),
+            tuple(module.note_on for module in modules))
+
+
+class NoteRoutes:
+    """
+    Which note handlers every event source reaches, worked out once per chain.
+
+    Receivers are modules with note_on and note_off; those that also send
+    notes of their own (a note_callback, i.e. the arpeggiator) are note
+    sources. The table maps:
+      - 'user': played notes go to the first arpeggiator if there is one,
+        otherwise to every other receiver,
+      - 'arpeggiator': the arpeggiator's notes go to every other receiver,
+      - midi_source(channel): like 'user', limited to modules whose
+        midi_channel is None or that channel.
+    Unknown sources reach nobody.
+
+    ModuleChainManager rebuilds it whenever the chain or graph changes, so a
+    note event costs one dict lookup plus its actual handlers, however long
+    the chain is.
+    """
+    def __init__(self, modules=()):
+        receivers = [m for m in modules if hasattr(m, 'note_on') and hasattr(m, 'note_off')]
+        arpeggiators = [m for m in receivers if hasattr(m, 'note_callback')]
+        voices = [m for m in receivers if not hasattr(m, 'note_callback')]
+
+        table = {
+            'user': _handlers(arpeggiators[:1] or voices),
+            'arpeggiator': _handlers(voices),
+        }
+        for channel, source in enumerate(_MIDI_SOURCES):
+            listening = [m for m in arpeggiators if _listens(m, channel)][:1]
+            if not listening:
+                listening = [m for m in voices if _listens(m, channel)]
+            table[source] = _handlers(listening)
+        self.table = table
+
+    def handlers(self, source, is_press):
+        """The note_on (is_press) or note_off handlers 'source' reaches."""
+        routes = self.table.get(source)
+        return routes[is_press] if routes is not None else ()
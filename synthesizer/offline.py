@@ -0,0 +1,202 @@
+# synthesizer/offline.py
+
+import argparse
+import math
+import os
+import time
+import wave
+
+import numpy as np
+
+from synthesizer.midi_file import read_midi_notes
+from synthesizer.note_routing import midi_source
+
+_NOTE_NAMES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+
+def parse_note(text):
+    """
+    MIDI note number from '60' or a name like 'C4', 'F#3', 'Bb2' (C4 = 60).
+    """
+    if text.lstrip('-').isdigit():
+        return int(text)
+    letter = text[0].upper()
+    if letter not in _NOTE_NAMES:
+        raise ValueError(f"Unknown note {text!r}")
+    pitch = _NOTE_NAMES[letter]
+    rest = text[1:]
+    while rest and rest[0] in '#b':
+        pitch += 1 if rest[0] == '#' else -1
+        rest = rest[1:]
+    return pitch + 12 * (int(rest) + 1)
+
+
+def read_event_script(path):
+    """
+    Read a note script: one event per line, '<seconds> on|off <note>', where
+    note is a MIDI number or a name ('C4', 'F#3'). '#' starts a comment.
+    Also accepts '<seconds> note <note> <duration>' for a press and its release.
+    Returns (seconds, midi_note, is_press) tuples in time order.
+    """
+    events = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            try:
+                seconds = float(fields[0])
+                action = fields[1].lower()
+                note = parse_note(fields[2])
+                if action == 'on':
+                    events.append((seconds, note, True))
+                elif action == 'off':
+                    events.append((seconds, note, False))
+                elif action == 'note':
+                    events.append((seconds, note, True))
+                    events.append((seconds + float(fields[3]), note, False))
+                else:
+                    raise ValueError(f"unknown action {action!r}")
+            except (IndexError, ValueError) as e:
+                raise ValueError(f"{path}:{line_number}: {e}") from None
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def read_events(path):
+    """
+    Note events from a MIDI file (.mid/.midi) or a note script (anything else).
+    MIDI notes carry their channel's event source (midi_source), so they are
+    routed by channel; script notes count as played ('user').
+    """
+    if os.path.splitext(path)[1].lower() in ('.mid', '.midi'):
+        return [(seconds, note, is_press, midi_source(channel))
+                for seconds, note, is_press, channel in read_midi_notes(path)]
+    return read_event_script(path)
+
+
+def write_wav(path, pcm, sample_rate, output_format=None):
+    """
+    Write samples in an OutputFormat's layout (int16 mono if not given) to a
+    WAV file. WAV here is integer PCM only, so float32 is refused.
+    """
+    sample_format = output_format.sample_format if output_format else 'int16'
+    if sample_format == 'float32':
+        raise ValueError("WAV output needs an int16 or int24 sample format")
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(output_format.channels if output_format else 1)
+        f.setsampwidth(3 if sample_format == 'int24' else 2)
+        f.setframerate(sample_rate)
+        if sample_format == 'int16':
+            pcm = np.ascontiguousarray(pcm, dtype='<i2')
+        f.writeframes(np.ascontiguousarray(pcm).tobytes())
+
+
+def render_offline(audio_manager, events, path=None, duration=None, tail=1.0, frame_count=None):
+    """
+    Drive the AudioManager's chain from 'events' ((seconds, midi_note, is_press),
+    optionally with an event source as a fourth item; in any order) as fast as
+    possible, without an audio device. Events at the same sample keep their
+    order in 'events', so a note-off followed by a note-on retriggers the note.
+
+    Each event is dispatched at its exact sample, the same way live input is.
+    The render lasts 'duration' seconds, or until the last event plus 'tail'
+    seconds (for release tails and effects). The output latency (the limiter's
+    lookahead) is rendered on top and trimmed from the start, so the file lines
+    up with the event times. The samples, in the AudioManager's output format,
+    are written to 'path' as WAV if given.
+
+    Returns (pcm, report). The report holds the rendered and wall-clock
+    seconds, the real-time factor 'rtf' (wall time / audio time, below 1 is
+    faster than real time), its inverse 'speed' and the trimmed
+    'latency_samples'.
+    """
+    sample_rate = audio_manager.sample_rate
+    frame_count = frame_count or audio_manager.buffer_size
+    # Sorted on the sample only: a stable sort keeps same-sample events in order
+    timeline = sorted((
+        (int(round(event[0] * sample_rate)), event[1], bool(event[2]),
+         event[3] if len(event) > 3 else "user")
+        for event in events
+    ), key=lambda event: event[0])
+    if duration is None:
+        last = timeline[-1][0] if timeline else 0
+        total = last + int(math.ceil(tail * sample_rate))
+    else:
+        total = int(math.ceil(duration * sample_rate))
+    latency = audio_manager.output_latency
+    rendered = total + latency
+
+    output_format = audio_manager.output_format
+    pcm = output_format.allocate(rendered)
+    audio_manager.transport.reset()
+    block_events = []
+    next_event = 0
+
+    start = time.perf_counter()
+    for block_start in range(0, rendered, frame_count):
+        num_samples = min(frame_count, rendered - block_start)
+        block_end = block_start + num_samples
+        block_events.clear()
+        while next_event < len(timeline) and timeline[next_event][0] < block_end:
+            sample, note, is_press, source = timeline[next_event]
+            block_events.append((max(sample - block_start, 0), note, is_press, source))
+            next_event += 1
+        pcm[block_start:block_end] = audio_manager.render_block(num_samples, block_events)
+    elapsed = time.perf_counter() - start
+    pcm = pcm[latency:]
+
+    if path is not None:
+        write_wav(path, pcm, sample_rate, output_format)
+
+    audio_seconds = total / sample_rate
+    report = {
+        'audio_seconds': audio_seconds,
+        'render_seconds': elapsed,
+        'rtf': elapsed / audio_seconds if audio_seconds else 0.0,
+        'speed': audio_seconds / elapsed if elapsed else float('inf'),
+        'blocks': int(math.ceil(rendered / frame_count)) if rendered else 0,
+        'latency_samples': latency,
+    }
+    return pcm, report
+
+
+def main(argv=None):
+    from synthesizer.audio2 import AudioManager
+    from modules.polysynth_module import PolySynthModule
+    from modules.lowpass_filter_module import LowPassFilterModule
+
+    parser = argparse.ArgumentParser(
+        description="Render a note script or MIDI file to WAV, without an audio device."
+    )
+    parser.add_argument("input", help="note script (see read_event_script) or .mid file")
+    parser.add_argument("-o", "--output", default="render.wav", help="WAV file to write")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--buffer-size", type=int, default=512)
+    parser.add_argument("--format", default="int16", choices=("int16", "int24"), help="WAV sample format")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--waveform", default="sawtooth")
+    parser.add_argument("--voices", type=int, default=8)
+    parser.add_argument("--lowpass", type=float, default=None, help="add a low-pass filter at this cutoff (Hz)")
+    parser.add_argument("--tail", type=float, default=1.0, help="seconds rendered after the last event")
+    parser.add_argument("--duration", type=float, default=None, help="render exactly this many seconds")
+    args = parser.parse_args(argv)
+
+    audio_manager = AudioManager(sample_rate=args.sample_rate, buffer_size=args.buffer_size,
+                                 sample_format=args.format, channels=args.channels)
+    chain = audio_manager.module_chain_manager
+    chain.add_module(PolySynthModule(args.sample_rate, args.voices, args.waveform))
+    if args.lowpass is not None:
+        chain.add_module(LowPassFilterModule(args.lowpass, args.sample_rate))
+
+    events = read_events(args.input)
+    _, report = render_offline(audio_manager, events, args.output, args.duration, args.tail)
+    print(
+        f"Rendered {report['audio_seconds']:.2f} s in {report['render_seconds']:.3f} s: "
+        f"RTF {report['rtf']:.4f} ({report['speed']:.1f}x real time) -> {args.output}"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    main()
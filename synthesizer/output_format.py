@@ -0,0 +1,103 @@
+# synthesizer/output_format.py
+
+import sys
+
+import numpy as np
+
+OUTPUT_FORMATS = ('float32', 'int16', 'int24')
+
+# Full scale of each integer format (float 1.0 maps to it)
+_FULL_SCALE = {'int16': 32767.0, 'int24': 8388607.0}
+_SAMPLE_WIDTH = {'float32': 4, 'int16': 2, 'int24': 3}
+# Bytes of a native int32 that hold its low 24 bits
+_LOW_BYTES = slice(0, 3) if sys.byteorder == 'little' else slice(1, 4)
+
+
+class OutputFormat:
+    """
+    The sample format and channel count of the device stream, and the block
+    buffer that goes to it.
+
+    encode(audio) writes the finished mono mix straight into a preallocated,
+    interleaved buffer of the stream's format (every channel gets the mix) and
+    returns that buffer, which PortAudio reads in place through the buffer
+    protocol: no bytes object is built per block.
+
+    Formats:
+      - 'float32': samples as they are (-1..+1),
+      - 'int16': scaled to 16 bits (the default),
+      - 'int24': scaled to 24 bits, packed 3 bytes per sample.
+    """
+    def __init__(self, sample_format='int16', channels=1):
+        self.sample_format = 'int16'
+        self.set_sample_format(sample_format)
+        self.channels = 1
+        self.set_channels(channels)
+
+    def set_sample_format(self, sample_format):
+        sample_format = sample_format.lower().strip()
+        if sample_format in OUTPUT_FORMATS:
+            self.sample_format = sample_format
+            self._buffer = None
+        else:
+            print(f"Unknown sample format {sample_format}; keeping {self.sample_format}.")
+
+    def set_channels(self, channels):
+        if int(channels) >= 1:
+            self.channels = int(channels)
+            self._buffer = None
+        else:
+            print(f"Channel count must be at least 1; keeping {self.channels}.")
+
+    @property
+    def sample_width(self):
+        """Bytes per sample of one channel."""
+        return _SAMPLE_WIDTH[self.sample_format]
+
+    @property
+    def frame_bytes(self):
+        return self.sample_width * self.channels
+
+    def pyaudio_format(self, pyaudio):
+        return {
+            'float32': pyaudio.paFloat32,
+            'int16': pyaudio.paInt16,
+            'int24': pyaudio.paInt24,
+        }[self.sample_format]
+
+    def allocate(self, frame_count):
+        """
+        A zeroed array shaped like encode's output for frame_count frames:
+        (frames, channels) of float32 or int16, or (frames, 3 * channels) bytes
+        for int24.
+        """
+        if self.sample_format == 'int24':
+            return np.zeros((frame_count, 3 * self.channels), dtype=np.uint8)
+        return np.zeros((frame_count, self.channels), dtype=np.dtype(self.sample_format))
+
+    def encode(self, audio):
+        """
+        Convert a float32 mono block, already clipped to -1..+1, into the
+        stream's format. 'audio' is used as scratch (scaled in place). Returns
+        a view of the reused output buffer, valid until the next call.
+        """
+        frame_count = audio.shape[0]
+        if self._buffer is None or self._buffer.shape[0] < frame_count:
+            self._buffer = self.allocate(frame_count)
+            # int24 goes through whole int32 samples before packing
+            self._wide = np.zeros((frame_count, self.channels), dtype=np.int32)
+        out = self._buffer[:frame_count]
+        # One column per channel: copying the (frames, 1) mix interleaves it
+        mix = audio[:, np.newaxis]
+
+        if self.sample_format == 'float32':
+            np.copyto(out, mix)
+        elif self.sample_format == 'int16':
+            audio *= _FULL_SCALE['int16']
+            np.copyto(out, mix, casting='unsafe')
+        else:
+            audio *= _FULL_SCALE['int24']
+            wide = self._wide[:frame_count]
+            np.copyto(wide, mix, casting='unsafe')
+            np.copyto(out.reshape(-1, 3), wide.view(np.uint8).reshape(-1, 4)[:, _LOW_BYTES])
+        return out
@@ -0,0 +1,167 @@
+# synthesizer/parallel.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+RENDER_MODES = ('serial', 'parallel', 'auto')
+
+
+class ParallelRenderer:
+    """
+    Renders an ExecutionPlan with the steps of each level spread over a pool of
+    worker threads.
+
+    NumPy releases the GIL inside its array kernels, so independent branches
+    whose work is mostly block-sized array math (voice banks, filters, delay
+    lines) overlap on separate cores while the Python glue between kernels takes
+    turns. The pool is synchronized once per plan level, against a deadline of
+    'deadline' times the block's duration. A level that misses the deadline is
+    still waited for (its buffers are being written), but the miss is counted.
+
+    mode:
+      - 'serial': plain ExecutionPlan.run,
+      - 'parallel': always use the pool when a level has more than one step,
+      - 'auto' (default): time both and render serially unless the pool is at
+        least 'min_speedup' times faster. Every probe_interval blocks starts
+        with probe_blocks serial blocks, then probe_blocks parallel ones; the
+        first block of each run is not counted (the threads are still settling).
+    """
+    def __init__(self, sample_rate=44100, workers=None, mode='auto', deadline=0.8,
+                 min_speedup=1.1, probe_interval=256, probe_blocks=8):
+        self.sample_rate = sample_rate
+        self.workers = workers or max(2, min(8, os.cpu_count() or 2))
+        self.mode = 'auto'
+        self.set_mode(mode)
+        self.deadline = deadline
+        self.min_speedup = min_speedup
+        self.probe_blocks = max(2, probe_blocks)
+        self.probe_interval = max(probe_interval, 2 * self.probe_blocks + 1)
+        self._executor = None
+
+        # Seconds per sample, averaged over the last probe (None until measured)
+        self.serial_cost = None
+        self.parallel_cost = None
+        self._probe_total = [0.0, 0.0]
+        self.blocks = 0
+        self.deadline_misses = 0
+        self.use_parallel = False
+
+    def set_mode(self, mode):
+        mode = mode.lower().strip()
+        if mode in RENDER_MODES:
+            self.mode = mode
+        else:
+            print(f"Unknown render mode {mode}; keeping {self.mode}.")
+
+    @property
+    def speedup(self):
+        """
+        Measured serial time / parallel time per sample, or None until both
+        have been measured.
+        """
+        if not self.serial_cost or not self.parallel_cost:
+            return None
+        return self.serial_cost / self.parallel_cost
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'rendering': 'parallel' if self.use_parallel else 'serial',
+            'speedup': self.speedup,
+            'serial_ns_per_sample': None if self.serial_cost is None else self.serial_cost * 1e9,
+            'parallel_ns_per_sample': None if self.parallel_cost is None else self.parallel_cost * 1e9,
+            'deadline_misses': self.deadline_misses,
+            'blocks': self.blocks,
+        }
+
+    def close(self):
+        """
+        Stop the worker threads (they are started again on demand).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def run(self, plan, frame_count):
+        """
+        Render 'plan' for frame_count samples and return its output.
+        """
+        if plan.width < 2:
+            # Nothing could run side by side
+            return plan.run(frame_count)
+        parallel = self._choose()
+        start = time.perf_counter()
+        if parallel:
+            output = self._run_parallel(plan, frame_count, start)
+        else:
+            output = plan.run(frame_count)
+        self._record(parallel, (time.perf_counter() - start) / max(frame_count, 1))
+        return output
+
+    # ─────────────────────────────────────────────────────────
+    # Internals
+    # ─────────────────────────────────────────────────────────
+    def _choose(self):
+        if self.mode == 'serial':
+            return False
+        if self.mode == 'parallel':
+            return True
+        position = self.blocks % self.probe_interval
+        if position < 2 * self.probe_blocks:
+            return position >= self.probe_blocks
+        return self.use_parallel
+
+    def _record(self, parallel, cost):
+        position = self.blocks % self.probe_interval
+        self.blocks += 1
+        if self.mode != 'auto':
+            self.use_parallel = self.mode == 'parallel'
+            if parallel:
+                self.parallel_cost = cost
+            else:
+                self.serial_cost = cost
+            return
+
+        if position >= 2 * self.probe_blocks:
+            return
+        if position % self.probe_blocks != 0:
+            self._probe_total[parallel] += cost
+        if position == 2 * self.probe_blocks - 1:
+            counted = self.probe_blocks - 1
+            self.serial_cost = self._probe_total[0] / counted
+            self.parallel_cost = self._probe_total[1] / counted
+            self._probe_total = [0.0, 0.0]
+            speedup = self.speedup
+            self.use_parallel = speedup is not None and speedup >= self.min_speedup
+
+    def _run_parallel(self, plan, frame_count, start):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="synth-render")
+        executor = self._executor
+        deadline = start + self.deadline * frame_count / self.sample_rate
+
+        plan.pool.reserve(frame_count)
+        for level in plan.levels:
+            if len(level) == 1:
+                step = level[0]
+                plan.render_step(step, plan.step_input(step, frame_count), frame_count)
+                continue
+
+            # Inputs are summed here, one step at a time; only generate(...) runs
+            # on the workers. This thread renders the first step itself.
+            inputs = [plan.step_input(step, frame_count) for step in level]
+            futures = [
+                executor.submit(plan.render_step, step, input_audio, frame_count)
+                for step, input_audio in zip(level[1:], inputs[1:])
+            ]
+            plan.render_step(level[0], inputs[0], frame_count)
+            _, pending = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+            if pending:
+                self.deadline_misses += 1
+                wait(pending)
+            for future in futures:
+                future.result()
+        return plan.output(frame_count)
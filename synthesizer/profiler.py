@@ -0,0 +1,227 @@
+# synthesizer/profiler.py
+
+import threading
+
+import numpy as np
+
+# PortAudio callback status flags (paOutputUnderflow, paOutputOverflow)
+OUTPUT_UNDERFLOW = 0x4
+OUTPUT_OVERFLOW = 0x8
+
+_PERCENTILES = (50, 95, 99)
+
+
+class TimingRing:
+    """
+    The last 'capacity' timings (seconds) in a preallocated array, oldest
+    overwritten first.
+    """
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def add(self, seconds):
+        self.values[self.count % self.capacity] = seconds
+        self.count += 1
+
+    def recent(self):
+        return self.values[:min(self.count, self.capacity)]
+
+    def summary(self, budget=None):
+        """
+        Percentiles, mean and max in milliseconds (plus load in % of 'budget'
+        seconds), over the timings still in the ring. None if it is empty.
+        """
+        values = self.recent()
+        if values.size == 0:
+            return None
+        p50, p95, p99 = np.percentile(values, _PERCENTILES)
+        summary = {
+            'count': self.count,
+            'mean_ms': float(values.mean()) * 1e3,
+            'p50_ms': float(p50) * 1e3,
+            'p95_ms': float(p95) * 1e3,
+            'p99_ms': float(p99) * 1e3,
+            'max_ms': float(values.max()) * 1e3,
+        }
+        if budget:
+            summary['load_percent'] = float(values.mean()) / budget * 100.0
+            summary['peak_load_percent'] = float(values.max()) / budget * 100.0
+        return summary
+
+
+class _ModuleTimer:
+    # Time one module spent in the current block (summed over sub-blocks)
+    __slots__ = ('name', 'ring', 'pending', 'touched')
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.ring = TimingRing(capacity)
+        self.pending = 0.0
+        self.touched = False
+
+
+class EngineProfiler:
+    """
+    Wall-time instrumentation of the audio engine, enabled with
+    AudioManager.enable_profiling().
+
+    Per block it records, into preallocated TimingRings:
+      - callback: the whole PortAudio callback,
+      - render: render_block (the callback itself with direct rendering, the
+        render-ahead worker otherwise),
+      - modules: every module's generate(...) time, summed over the block,
+      - interval: time between callback starts, whose spread is the jitter.
+    It also counts deadline misses (a callback or render slower than
+    'deadline' times the block's duration) and the underflow/overflow flags
+    PortAudio reports in the callback's status.
+
+    stats() summarizes the rings (percentiles, max, real-time load in % of the
+    block duration); with print_interval set, a background thread prints
+    report() every print_interval seconds. Nothing is measured while the
+    profiler is not installed: the engine only checks for it once per call.
+    """
+    def __init__(self, sample_rate=44100, capacity=1024, deadline=1.0, print_interval=None):
+        self.sample_rate = sample_rate
+        self.capacity = capacity
+        self.deadline = deadline
+        self.print_interval = print_interval
+        self._printer = None
+        self._stop = threading.Event()
+        self.reset()
+
+    def reset(self):
+        self.callback = TimingRing(self.capacity)
+        self.render = TimingRing(self.capacity)
+        self.interval = TimingRing(self.capacity)
+        self._timers = {}
+        self._last_start = None
+        self.block_duration = None
+        self.callbacks = 0
+        self.blocks = 0
+        self.deadline_misses = 0
+        self.underflows = 0
+        self.overflows = 0
+
+    # ─────────────────────────────────────────────────────────
+    # Recording (audio and render threads)
+    # ─────────────────────────────────────────────────────────
+    def module_timer(self, module, name=None):
+        timer = self._timers.get(module)
+        if timer is None:
+            timer = _ModuleTimer(name or type(module).__name__, self.capacity)
+            self._timers[module] = timer
+        return timer
+
+    def add_module_time(self, module, seconds, name=None):
+        timer = self.module_timer(module, name)
+        timer.pending += seconds
+        timer.touched = True
+
+    def end_block(self, seconds, frame_count):
+        """A block was rendered in 'seconds': push it and the module times."""
+        self.blocks += 1
+        self.render.add(seconds)
+        budget = frame_count / self.sample_rate
+        self.block_duration = budget
+        if seconds > budget * self.deadline:
+            self.deadline_misses += 1
+        for timer in self._timers.values():
+            if timer.touched:
+                timer.ring.add(timer.pending)
+                timer.pending = 0.0
+                timer.touched = False
+
+    def begin_callback(self, start, status):
+        self.callbacks += 1
+        if self._last_start is not None:
+            self.interval.add(start - self._last_start)
+        self._last_start = start
+        if status:
+            if status & OUTPUT_UNDERFLOW:
+                self.underflows += 1
+            if status & OUTPUT_OVERFLOW:
+                self.overflows += 1
+
+    def end_callback(self, seconds, frame_count):
+        self.callback.add(seconds)
+        if seconds > frame_count / self.sample_rate * self.deadline:
+            self.deadline_misses += 1
+
+    # ─────────────────────────────────────────────────────────
+    # Reporting
+    # ─────────────────────────────────────────────────────────
+    def stats(self):
+        budget = self.block_duration
+        intervals = self.interval.recent()
+        jitter = None
+        if intervals.size and budget:
+            deviation = intervals - budget
+            jitter = {
+                'std_ms': float(deviation.std()) * 1e3,
+                'max_ms': float(np.abs(deviation).max()) * 1e3,
+            }
+        modules = {}
+        for timer in list(self._timers.values()):
+            name = timer.name
+            suffix = 2
+            while name in modules:
+                name = f"{timer.name}#{suffix}"
+                suffix += 1
+            modules[name] = timer.ring.summary(budget)
+        return {
+            'block_ms': budget * 1e3 if budget else None,
+            'callbacks': self.callbacks,
+            'blocks': self.blocks,
+            'callback': self.callback.summary(budget),
+            'render': self.render.summary(budget),
+            'modules': modules,
+            'jitter': jitter,
+            'deadline_misses': self.deadline_misses,
+            'underflows': self.underflows,
+            'overflows': self.overflows,
+        }
+
+    def report(self):
+        """stats() as a few lines of text."""
+        stats = self.stats()
+        lines = [
+            f"blocks {stats['blocks']}  callbacks {stats['callbacks']}  "
+            f"deadline misses {stats['deadline_misses']}  underflows {stats['underflows']}"
+        ]
+        for label in ('callback', 'render'):
+            summary = stats[label]
+            if summary is not None:
+                lines.append(self._format(label, summary))
+        if stats['jitter'] is not None:
+            lines.append(f"  jitter               std {stats['jitter']['std_ms']:.3f} ms  "
+                         f"max {stats['jitter']['max_ms']:.3f} ms")
+        for name, summary in stats['modules'].items():
+            if summary is not None:
+                lines.append(self._format(name, summary))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format(label, summary):
+        line = (f"  {label:<20} p50 {summary['p50_ms']:.3f}  p95 {summary['p95_ms']:.3f}  "
+                f"p99 {summary['p99_ms']:.3f}  max {summary['max_ms']:.3f} ms")
+        if 'load_percent' in summary:
+            line += f"  load {summary['load_percent']:.1f}%"
+        return line
+
+    def start_printing(self):
+        if self.print_interval and self._printer is None:
+            self._stop.clear()
+            self._printer = threading.Thread(target=self._print_loop, name="synth-profiler", daemon=True)
+            self._printer.start()
+
+    def stop_printing(self):
+        if self._printer is not None:
+            self._stop.set()
+            self._printer.join()
+            self._printer = None
+
+    def _print_loop(self):
+        while not self._stop.wait(self.print_interval):
+            print(self.report())
@@ -0,0 +1,186 @@
+# synthesizer/render_ahead.py
+
+import threading
+
+import numpy as np
+
+
+class OutputRing:
+    """
+    Lock-free single-producer/single-consumer ring of output frames.
+
+    Frames are stored as raw bytes (frame_bytes per frame, in the stream's
+    format) in one preallocated array. As in SPSCQueue, the producer only
+    ever writes 'tail' and the consumer only ever writes 'head'; frames are
+    copied in before 'tail' is published and copied out before 'head' is, so
+    neither side takes a lock.
+    """
+    def __init__(self, capacity, frame_bytes):
+        self.capacity = capacity
+        self.frame_bytes = frame_bytes
+        self.data = np.zeros((capacity, frame_bytes), dtype=np.uint8)
+        self.head = 0  # frames read (written by the consumer only)
+        self.tail = 0  # frames written (written by the producer only)
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def space(self):
+        return self.capacity - (self.tail - self.head)
+
+    def write(self, frames):
+        """
+        Producer side: append 'frames' ((n, frame_bytes) uint8); the caller
+        checks space() first.
+        """
+        count = frames.shape[0]
+        start = self.tail % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = frames[:first]
+        if first < count:
+            self.data[:count - first] = frames[first:]
+        self.tail += count
+
+    def read_into(self, out):
+        """
+        Consumer side: fill 'out' ((n, frame_bytes) uint8) with the oldest
+        frames. Returns how many were available; the rest of 'out' is zeroed
+        (silence in every sample format).
+        """
+        count = min(out.shape[0], self.tail - self.head)
+        start = self.head % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        if first < count:
+            out[first:count] = self.data[:count - first]
+        if count < out.shape[0]:
+            out[count:] = 0
+        self.head += count
+        return count
+
+
+class RenderAhead:
+    """
+    Renders the AudioManager's blocks on a dedicated thread, 'blocks_ahead'
+    blocks ahead of the device, so the PortAudio callback only copies finished
+    frames out of an OutputRing.
+
+    A GIL pause (a Tk redraw, pynput, garbage collection) then only drains the
+    ring instead of causing an underrun, at the cost of blocks_ahead blocks of
+    extra latency. The counters show where a machine sits on that trade-off:
+      - fill: frames buffered now; min_fill: the lowest seen by a callback since
+        reset_stats() (close to zero means blocks_ahead is barely enough),
+      - underruns / underrun_frames: callbacks the ring could not fully serve,
+        and the frames replaced by silence.
+    """
+    def __init__(self, audio_manager, blocks_ahead=4, block_size=None):
+        self.audio_manager = audio_manager
+        self.blocks_ahead = max(1, int(blocks_ahead))
+        self.block_size = block_size or audio_manager.buffer_size
+        self.frame_bytes = audio_manager.output_format.frame_bytes
+        self.ring = OutputRing(self.blocks_ahead * self.block_size, self.frame_bytes)
+        # The callback's block, handed to PortAudio as is
+        self._out = np.zeros((self.block_size, self.frame_bytes), dtype=np.uint8)
+
+        self._space = threading.Event()
+        self._thread = None
+        self._running = False
+        self.error = None
+        self.reset_stats()
+
+    @property
+    def latency(self):
+        """Frames of audio the ring holds ahead of the device when full."""
+        return self.ring.capacity
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def reset_stats(self):
+        self.underruns = 0
+        self.underrun_frames = 0
+        self.min_fill = None
+        self.blocks_rendered = 0
+
+    def stats(self):
+        return {
+            'blocks_ahead': self.blocks_ahead,
+            'capacity_frames': self.ring.capacity,
+            'fill': len(self.ring),
+            'fill_ratio': len(self.ring) / self.ring.capacity,
+            'min_fill': self.min_fill,
+            'underruns': self.underruns,
+            'underrun_frames': self.underrun_frames,
+            'blocks_rendered': self.blocks_rendered,
+            'latency_seconds': self.latency / self.audio_manager.sample_rate,
+        }
+
+    def start(self):
+        """
+        Fill the ring on the calling thread, then hand rendering to the worker.
+        Call while nothing else renders (before the stream starts).
+        """
+        if self._thread is not None:
+            return
+        while self.ring.space() >= self.block_size:
+            self._render_one()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="synth-render-ahead", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the worker and drop the buffered frames. Call after the stream
+        has stopped.
+        """
+        if self._thread is None:
+            return
+        self._running = False
+        self._space.set()
+        self._thread.join()
+        self._thread = None
+        self.ring.head = self.ring.tail = 0
+
+    def read(self, frame_count):
+        """
+        Consumer side, for the audio callback: the next frame_count frames as a
+        reused (frame_count, frame_bytes) buffer.
+        """
+        if self._out.shape[0] < frame_count:
+            self._out = np.zeros((frame_count, self.frame_bytes), dtype=np.uint8)
+        out = self._out[:frame_count]
+        fill = len(self.ring)
+        if self.min_fill is None or fill < self.min_fill:
+            self.min_fill = fill
+        available = self.ring.read_into(out)
+        if available < frame_count:
+            self.underruns += 1
+            self.underrun_frames += frame_count - available
+        # Wake the worker: there is room for another block
+        self._space.set()
+        return out
+
+    # ─────────────────────────────────────────────────────────
+    # Worker
+    # ─────────────────────────────────────────────────────────
+    def _render_one(self):
+        block = self.audio_manager.render_block(self.block_size)
+        # (frames, channels) of any sample format as raw bytes per frame
+        self.ring.write(block.view(np.uint8).reshape(self.block_size, self.frame_bytes))
+        self.blocks_rendered += 1
+
+    def _run(self):
+        timeout = self.block_size / self.audio_manager.sample_rate
+        try:
+            while self._running:
+                if self.ring.space() >= self.block_size:
+                    self._render_one()
+                    continue
+                self._space.clear()
+                # Re-check: the callback may have made room before the clear
+                if self.ring.space() < self.block_size:
+                    self._space.wait(timeout)
+        except Exception as e:
+            self.error = e
+            print(f"Render-ahead worker stopped: {e}")
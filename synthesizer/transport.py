@@ -0,0 +1,104 @@
+# Beats (quarter notes) per straight note value
+_BASE_DIVISIONS = {
+    "1/1": 4.0,
+    "1/2": 2.0,
+    "1/4": 1.0,
+    "1/8": 0.5,
+    "1/16": 0.25,
+    "1/32": 0.125,
+}
+
+# Straight, triplet ("T") and dotted (".") note divisions, e.g. "1/8", "1/16T", "1/4."
+NOTE_DIVISIONS = tuple(
+    name + suffix for suffix in ("", "T", ".") for name in _BASE_DIVISIONS
+)
+
+
+def division_beats(division):
+    """
+    Length of a note division in beats (quarter notes), or None if unknown.
+    """
+    if division is None:
+        return None
+    if division.endswith("T"):
+        base = _BASE_DIVISIONS.get(division[:-1])
+        return None if base is None else base * 2.0 / 3.0
+    if division.endswith("."):
+        base = _BASE_DIVISIONS.get(division[:-1])
+        return None if base is None else base * 1.5
+    return _BASE_DIVISIONS.get(division)
+
+
+class Transport:
+    """
+    Engine-wide musical clock: tempo, sample position and bar/beat.
+
+    start_block(frame_count) is called once per audio block, before any module
+    runs; it applies a pending tempo change and publishes where the block starts
+    (block_start_sample, block_start_beat). Tempo-synced modules read that in
+    sync_transport(...) and derive their phase from it instead of keeping their
+    own free-running counters, so two renders of the same input are identical.
+    """
+    def __init__(self, sample_rate=44100, bpm=120.0, beats_per_bar=4):
+        self.sample_rate = sample_rate
+        self.beats_per_bar = beats_per_bar
+        self.bpm = max(1.0, float(bpm))
+        self._pending_bpm = self.bpm
+
+        self.sample_position = 0  # first sample of the next block
+        self.beat_position = 0.0  # beat at sample_position
+        self.block_start_sample = 0
+        self.block_start_beat = 0.0
+        self.block_size = 0
+
+    def set_bpm(self, bpm):
+        """
+        Tempo in beats per minute; takes effect at the next block boundary.
+        """
+        self._pending_bpm = max(1.0, float(bpm))
+
+    def reset(self):
+        """
+        Rewind to bar 1, beat 1 (e.g. before an offline render).
+        """
+        self.sample_position = 0
+        self.beat_position = 0.0
+        self.block_start_sample = 0
+        self.block_start_beat = 0.0
+        self.block_size = 0
+
+    @property
+    def samples_per_beat(self):
+        return self.sample_rate * 60.0 / self.bpm
+
+    def division_samples(self, division):
+        """
+        Length of a note division (e.g. "1/16T") in samples at the current tempo,
+        or None if the division is unknown.
+        """
+        beats = division_beats(division)
+        if beats is None:
+            return None
+        return beats * self.samples_per_beat
+
+    def start_block(self, frame_count):
+        self.bpm = self._pending_bpm
+        self.block_start_sample = self.sample_position
+        self.block_start_beat = self.beat_position
+        self.block_size = frame_count
+        self.sample_position += frame_count
+        self.beat_position += frame_count / self.samples_per_beat
+
+    @property
+    def bar(self):
+        """
+        1-based bar number at the start of the current block.
+        """
+        return int(self.block_start_beat // self.beats_per_bar) + 1
+
+    @property
+    def beat_in_bar(self):
+        """
+        Beat within the bar at the start of the current block (0-based, fractional).
+        """
+        return self.block_start_beat % self.beats_per_bar
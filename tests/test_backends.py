@@ -0,0 +1,31 @@
+# tests/test_backends.py
+
+import numpy as np
+
+from synthesizer.backends import CALLBACK_CONTINUE, FileBackend
+
+
+def _silence(in_data, frame_count, time_info, status):
+    return np.zeros(frame_count, dtype=np.int16).tobytes(), CALLBACK_CONTINUE
+
+
+def test_callback_error_closes_the_stream(tmp_path):
+    backend = FileBackend(str(tmp_path / "out.wav"), buffer_size=64, speed=None)
+
+    def fail(in_data, frame_count, time_info, status):
+        raise RuntimeError("callback failed")
+
+    backend.start(fail)
+    backend._thread.join(timeout=5.0)
+    assert not backend.active
+    assert isinstance(backend.error, RuntimeError)
+    assert backend._file is None
+
+    # The stream can be started again, and stop() after the error is a no-op
+    backend.duration = 0.01
+    backend.start(_silence)
+    backend._thread.join(timeout=5.0)
+    assert backend.error is None
+    assert backend.blocks > 0
+    backend.stop()
+    assert backend._file is None
@@ -0,0 +1,29 @@
+# tests/test_block_allocations.py
+
+import pytest
+
+from modules.lowpass_filter_module import LowPassFilterModule
+from modules.polysynth_module import PolySynthModule
+from modules.tremolo_module import TremoloModule
+from modules.vibrato_module import VibratoModule
+from synthesizer.audio2 import AudioManager
+
+
+@pytest.mark.parametrize("oscillator_mode", ["wavetable", "naive"])
+@pytest.mark.parametrize("voices", [1, 8, 64])
+def test_steady_state_blocks_stay_within_tolerance(voices, oscillator_mode):
+    audio_manager = AudioManager(buffer_size=512)
+    synth = PolySynthModule(44100, voices, 'sawtooth', oscillator_mode)
+    synth.set_adsr(0.01, 0.1, 0.8, 5.0)
+    audio_manager.module_chain_manager.module_chain = [
+        synth, LowPassFilterModule(1200.0), TremoloModule(), VibratoModule(),
+    ]
+    notes = range(36, 36 + voices)
+    for note in notes:
+        synth.note_on(note)
+    for _ in range(16):
+        audio_manager.render_block(512)
+    # Half the voices releasing, half held
+    for note in notes[::2]:
+        synth.note_off(note)
+    audio_manager.assert_no_block_allocations(512)
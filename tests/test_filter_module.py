@@ -0,0 +1,38 @@
+# tests/test_filter_module.py
+
+import numpy as np
+import pytest
+
+from modules.bandpass_filter_module import BandPassFilterModule
+from modules.filter_engine import FILTER_SLOPES
+from modules.highpass_filter_module import HighPassFilterModule
+from modules.lowpass_filter_module import LowPassFilterModule
+
+BLOCK = 512
+
+
+def _noise():
+    return (np.random.default_rng(0).standard_normal(BLOCK) * 0.25).astype(np.float32)
+
+
+@pytest.mark.parametrize("filter_class", [LowPassFilterModule, HighPassFilterModule, BandPassFilterModule])
+@pytest.mark.parametrize("slope", FILTER_SLOPES)
+def test_resonance_glide_at_every_slope(filter_class, slope):
+    module = filter_class()
+    if slope not in module.slopes:
+        pytest.skip(f"{filter_class.__name__} has no {slope} dB slope")
+    module.set_slope(slope)
+    x = _noise()
+    out = np.zeros(BLOCK, dtype=np.float32)
+    module.generate(BLOCK, x, out=out)
+
+    # Resonance alone, then together with the cutoff, glide over several blocks
+    module.set_resonance(2.0)
+    for _ in range(8):
+        module.generate(BLOCK, x, out=out)
+        assert np.all(np.isfinite(out))
+    module.set_resonance(0.5)
+    module.set_cutoff(3000.0)
+    for _ in range(8):
+        module.generate(BLOCK, x, out=out)
+        assert np.all(np.isfinite(out))
@@ -0,0 +1,32 @@
+# tests/test_offline.py
+
+from modules.polysynth_module import PolySynthModule
+from modules.voice_bank import ENV_ATTACK
+from synthesizer.audio2 import AudioManager
+from synthesizer.offline import render_offline
+
+
+def _render(events, duration):
+    audio_manager = AudioManager(buffer_size=256)
+    synth = PolySynthModule(44100, 4, 'sawtooth')
+    synth.set_adsr(0.01, 0.05, 0.8, 0.05)
+    audio_manager.module_chain_manager.add_module(synth)
+    render_offline(audio_manager, events, duration=duration)
+    return synth
+
+
+def _held_notes(synth):
+    bank = synth.voice_bank
+    return {note for note, slot in synth.active_voices.items() if bank.env_state[slot] == ENV_ATTACK}
+
+
+def test_zero_duration_note_is_released():
+    # Note-on and note-off at the same time: the note-off must come second
+    synth = _render([(0.1, 60, True), (0.1, 60, False)], duration=0.5)
+    assert _held_notes(synth) == set()
+
+
+def test_same_sample_retrigger_keeps_the_note_held():
+    synth = _render([(0.0, 60, True), (0.2, 60, False), (0.2, 60, True)], duration=0.5)
+    assert _held_notes(synth) == {60}
+
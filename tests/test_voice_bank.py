@@ -0,0 +1,71 @@
+# tests/test_voice_bank.py
+
+import numpy as np
+
+from modules.voice_bank import ENV_ATTACK, ENV_RELEASE, VoiceBank
+
+SAMPLE_RATE = 44100
+BLOCK = 64
+
+
+def _bank(attack=0.01, decay=0.1, sustain=0.8, release=0.2):
+    bank = VoiceBank(num_voices=1, sample_rate=SAMPLE_RATE)
+    bank.set_adsr(attack, decay, sustain, release)
+    # A silent block puts the settings in place before any note starts
+    _render(bank)
+    return bank
+
+
+def _render(bank, blocks=1):
+    out = np.zeros(BLOCK, dtype=np.float32)
+    for _ in range(blocks):
+        bank.render('sine', BLOCK, out=out)
+    return float(bank.env_amplitude[0])
+
+
+def _step_after_change(bank, **adsr):
+    # Level at the end of the block before the change vs. the first sample after it
+    before = float(bank.env_amplitude[0])
+    settings = dict(attack=0.01, decay=0.1, sustain=0.8, release=0.2)
+    settings.update(adsr)
+    bank.set_adsr(**settings)
+    out = np.zeros(1, dtype=np.float32)
+    bank.render('sine', 1, out=out)
+    return abs(float(bank.env_amplitude[0]) - before)
+
+
+def test_attack_change_keeps_sustaining_voice_level():
+    bank = _bank()
+    bank.start(0, 60, 261.6)
+    assert abs(_render(bank, 200) - 0.8) < 1e-6
+    assert _step_after_change(bank, attack=2.0) < 1e-3
+    assert abs(_render(bank, 10) - 0.8) < 1e-6
+
+
+def test_attack_change_mid_attack_is_continuous():
+    bank = _bank(attack=0.5)
+    bank.start(0, 60, 261.6)
+    level = _render(bank, 50)
+    assert 0.0 < level < 1.0 and bank.env_state[0] == ENV_ATTACK
+    assert _step_after_change(bank, attack=0.1) < 1e-3
+
+
+def test_decay_change_mid_decay_is_continuous():
+    bank = _bank(attack=0.0, decay=1.0)
+    bank.start(0, 60, 261.6)
+    level = _render(bank, 100)
+    assert 0.8 < level < 1.0
+    assert _step_after_change(bank, decay=0.3) < 1e-3
+
+
+def test_release_change_keeps_releasing_voice_level():
+    bank = _bank()
+    bank.start(0, 60, 261.6)
+    _render(bank, 200)
+    bank.stop(0)
+    _render(bank, 20)
+    assert bank.env_state[0] == ENV_RELEASE
+    assert _step_after_change(bank, release=2.0) < 1e-3
+    # ...and the release goes on falling, now over the new time
+    level = float(bank.env_amplitude[0])
+    assert 0.0 < _render(bank, 10) < level